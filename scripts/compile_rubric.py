@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Compile rubric.json into src/_rubric_data.py (a literal RUBRIC dict) so get_rubric() skips JSON parsing on cold start.
+
+The module records rubric.json's sha256, so get_rubric() ignores it once the JSON changes; re-run after editing
+rubric.json to restore the fast path. Delete src/_rubric_data.py to go back to reading the JSON file.
+"""
+
+import hashlib
+import json
+import pprint
+import sys
+from pathlib import Path
+
+HEADER = '"""Generated by scripts/compile_rubric.py from rubric.json. Do not edit by hand."""\n\n'
+
+
+def main() -> int:
+    root = Path(__file__).resolve().parent.parent
+    rubric_path = root / "rubric.json"
+    out_path = root / "src" / "_rubric_data.py"
+    if not rubric_path.is_file():
+        print("rubric.json not found", file=sys.stderr)
+        return 1
+    raw = rubric_path.read_bytes()
+    try:
+        rubric = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"rubric.json is not valid JSON: {e}", file=sys.stderr)
+        return 1
+    body = f'RUBRIC_SHA256 = "{hashlib.sha256(raw).hexdigest()}"\n\n'
+    body += "RUBRIC = " + pprint.pformat(rubric, indent=1, width=120, sort_dicts=False) + "\n"
+    out_path.write_text(HEADER + body, encoding="utf-8")
+    print(f"Wrote {out_path.relative_to(root)} ({len(rubric.get('dimensions', []))} dimensions)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,12 @@
 
 import re
 
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -119,7 +120,7 @@ def run_audit(
                     pdf_path = default_url
             except Exception:
                 pass
-    rubric_dimensions = req.rubric_dimensions if req.rubric_dimensions is not None else get_dimensions()
+    rubric_dimensions = req.rubric_dimensions if req.rubric_dimensions is not None else list(get_dimensions())
     if not rubric_dimensions:
         raise HTTPException(
             status_code=500,
@@ -178,6 +179,10 @@ def get_run_status_result(run_id: str):
     record = get_run(run_id)
     if record is None:
         raise HTTPException(status_code=404, detail="Run not found")
+    cached = record.get("result_json")
+    if cached is not None:
+        body = {"run_id": run_id, "status": record["status"], "result": orjson.Fragment(cached), "error": record.get("error")}
+        return Response(content=orjson.dumps(body), media_type="application/json")
     result = None
     if record.get("result"):
         r = record["result"]
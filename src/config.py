@@ -1,6 +1,7 @@
 """Supported artifact types and their required tools. Used for rubric-agnostic runs and missing-tool reporting."""
 
 import os
+from pathlib import Path
 
 SUPPORTED_ARTIFACT_TOOLS: dict[str, list[str]] = {
     "github_repo": [
@@ -41,6 +42,49 @@ def get_judge_workers() -> int:
         return 3
 
 
+def get_pdf_text_workers() -> int:
+    """Max processes for per-page PDF text extraction. Default 1 (no process pool): spawning workers costs more than
+    it saves for reports under a few hundred pages, and spawn needs an `if __name__ == "__main__"` guard in scripts."""
+    v = os.environ.get("AUDITOR_PDF_TEXT_WORKERS", "1").strip()
+    try:
+        n = int(v)
+        return max(1, min(n, 32))
+    except ValueError:
+        return 1
+
+
+def get_pdf_cache_dir() -> Path | None:
+    """Directory for downloaded PDFs (keyed by URL hash). Default ~/.cache/automaton_auditor/pdfs; "off" disables."""
+    v = os.environ.get("AUDITOR_PDF_CACHE_DIR", "").strip()
+    if v.lower() in ("off", "none", "0", "false"):
+        return None
+    return Path(v).expanduser() if v else Path.home() / ".cache" / "automaton_auditor" / "pdfs"
+
+
+def get_pdf_cache_ttl_seconds() -> int:
+    """Seconds a cached PDF download is reused without an ETag/Last-Modified check (e.g. Google Drive). Default 86400."""
+    v = os.environ.get("AUDITOR_PDF_CACHE_TTL", "86400").strip()
+    try:
+        return max(0, int(v))
+    except ValueError:
+        return 86400
+
+
+def get_pdf_cache_max_bytes() -> int:
+    """Size cap for the PDF download cache; least recently used entries are evicted past it. Default 256 MB."""
+    v = os.environ.get("AUDITOR_PDF_CACHE_MAX_MB", "256").strip()
+    try:
+        return max(0, int(v)) * 1024 * 1024
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+def get_git_backend() -> str:
+    """Git implementation for repo clones and history: "cli" (git subprocess, default) or "pygit2" (in-process libgit2, needs pygit2)."""
+    v = os.environ.get("AUDITOR_GIT_BACKEND", "cli").strip().lower()
+    return v if v in ("cli", "pygit2") else "cli"
+
+
 def get_max_concurrent_runs() -> int:
     """Max concurrent graph runs (rate limit). Default 2 to avoid bursting LLM APIs."""
     v = os.environ.get("AUDITOR_MAX_CONCURRENT_RUNS", "2").strip()
@@ -51,6 +95,24 @@ def get_max_concurrent_runs() -> int:
         return 2
 
 
+def get_run_ttl_seconds() -> int:
+    """Seconds a completed/failed run stays in the in-memory run store after finishing. Default 3600."""
+    v = os.environ.get("AUDITOR_RUN_TTL", "3600").strip()
+    try:
+        return max(60, int(v))
+    except ValueError:
+        return 3600
+
+
+def get_max_stored_runs() -> int:
+    """Max run records kept in memory; least recently used finished runs are evicted first. Default 500."""
+    v = os.environ.get("AUDITOR_MAX_STORED_RUNS", "500").strip()
+    try:
+        return max(10, int(v))
+    except ValueError:
+        return 500
+
+
 def get_missing_tools_rationale(target_artifact: str) -> str:
     """Return rationale listing required tool names when artifact type is unsupported."""
     tools = SUPPORTED_ARTIFACT_TOOLS.get(target_artifact)
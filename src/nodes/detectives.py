@@ -51,10 +51,15 @@ def RunRelevantDetectivesNode(state: dict[str, Any]) -> dict[str, Any]:
         state_pdf = dict(state)
         if state.get("pdf_chunks") is None and state.get("pdf_images") is None:
             try:
-                from src.tools.doc_tools import extract_images_from_pdf, ingest_pdf, pdf_to_binary
-                pdf_bytes = pdf_to_binary(pdf_path)
-                state_pdf["pdf_chunks"] = ingest_pdf(pdf_path=pdf_path, pdf_bytes=pdf_bytes)
-                state_pdf["pdf_images"] = extract_images_from_pdf(pdf_path=pdf_path, pdf_bytes=pdf_bytes)
+                from src.tools.doc_tools import extract_images_from_pdf, ingest_pdf, pdf_to_binary, release_pdf_documents
+                try:
+                    # Local files stay on disk (fitz reads them through an mmap); only URLs are downloaded to bytes.
+                    pdf_bytes = pdf_to_binary(pdf_path) if pdf_path.startswith(("http://", "https://")) else None
+                    state_pdf["pdf_chunks"] = ingest_pdf(pdf_path=pdf_path, pdf_bytes=pdf_bytes)
+                    state_pdf["pdf_images"] = extract_images_from_pdf(pdf_path=pdf_path, pdf_bytes=pdf_bytes)
+                finally:
+                    # Ingest and image extraction shared one parsed document; nothing later in the run needs it.
+                    release_pdf_documents()
             except Exception as e:
                 state_pdf["pdf_path"] = ""
                 state_pdf["pdf_fetch_error"] = str(e).strip()[:250]
@@ -1,18 +1,33 @@
 """Supreme Court: alternative Chief Justice synthesis with hardcoded deliberation rules and Markdown report."""
 
+from functools import lru_cache
 from typing import Any
 
 from src.state import AgentState, AuditReport, CriterionResult, Evidence, JudicialOpinion
 
 
+@lru_cache(maxsize=512)
+def _humanize(cid: str) -> str:
+    """Fallback display name for a criterion id (e.g. graph_orchestration -> Graph Orchestration)."""
+    return cid.replace("_", " ").title()
+
+
 def chief_justice_node(state: AgentState) -> dict[str, Any]:
     """
     Synthesizes judicial opinions into a final verdict.
     Resolves conflicts using hardcoded deterministic logic.
     """
     opinions = state.get("opinions", [])
-    evidences = state.get("evidences", {})
     repo_url = state.get("repo_url", "")
+    if not opinions:
+        return {"final_report": AuditReport(
+            repo_url=repo_url,
+            pdf_path=state.get("pdf_path", ""),
+            executive_summary="No opinions to synthesize.",
+            overall_score=0.0,
+            overall_score_100=0.0,
+        )}
+    evidences = state.get("evidences", {})
     rubric_dims = state.get("rubric_dimensions") or []
 
     grouped: dict[str, list[JudicialOpinion]] = {}
@@ -25,6 +40,7 @@ def chief_justice_node(state: AgentState) -> dict[str, Any]:
         if isinstance(op, JudicialOpinion):
             grouped[cid].append(op)
         elif isinstance(op, dict):
+            # Plain dicts never went through the model, so validate them here (score range, judge name).
             grouped[cid].append(JudicialOpinion(
                 judge=op.get("judge", "TechLead"),
                 criterion_id=cid,
@@ -33,7 +49,11 @@ def chief_justice_node(state: AgentState) -> dict[str, Any]:
                 cited_evidence=op.get("cited_evidence") or [],
             ))
 
-    dim_name_by_id = {d.get("id", ""): d.get("name", "").strip() or d.get("id", "").replace("_", " ").title() for d in rubric_dims}
+    dim_name_by_id = {d.get("id", ""): d.get("name", "").strip() or _humanize(d.get("id", "")) for d in rubric_dims}
+
+    graph_evidence = evidences.get("graph_orchestration") or evidences.get("state_management_rigor") or []
+    # Evidence may arrive as plain dicts (same as opinions above), so don't assume the model's .found attribute.
+    has_graph = any(e.get("found") if isinstance(e, dict) else e.found for e in graph_evidence)
 
     criterion_results: list[CriterionResult] = []
 
@@ -52,8 +72,6 @@ def chief_justice_node(state: AgentState) -> dict[str, Any]:
         if crit_id == "graph_orchestration" and tech_lead:
             final_score = tech_lead.score
 
-        graph_evidence = evidences.get("graph_orchestration") or evidences.get("state_management_rigor") or []
-        has_graph = any(getattr(e, "found", False) for e in graph_evidence) if graph_evidence else False
         if defense and defense.score > 3 and not has_graph:
             final_score = min(final_score, 2)
             dissent_summary = "Evidence Rule: Defense claims of merit not supported by repository artifacts."
@@ -62,7 +80,7 @@ def chief_justice_node(state: AgentState) -> dict[str, Any]:
         if scores and (max(scores) - min(scores) > 2) and not dissent_summary:
             dissent_summary = f"High Variance: Significant disagreement between judges (Range: {min(scores)}-{max(scores)})."
 
-        dimension_name = dim_name_by_id.get(crit_id) or crit_id.replace("_", " ").title()
+        dimension_name = dim_name_by_id.get(crit_id) or _humanize(crit_id)
         criterion_results.append(CriterionResult(
             dimension_id=crit_id,
             dimension_name=dimension_name,
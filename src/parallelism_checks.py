@@ -12,16 +12,32 @@ def _get_graph(compiled: Any):
     return g()
 
 
-def _start_node(G: Any) -> str | None:
-    nodes = list(G.nodes())
+def _node_ids(G: Any) -> set[str]:
+    """Node names: LangGraph exposes G.nodes as a dict; networkx-style graphs as a callable."""
+    nodes = G.nodes
+    return set(nodes() if callable(nodes) else nodes)
+
+
+def _adjacency(G: Any) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Walk the edge list once and return (successors, predecessors) maps keyed by node name."""
+    edges = G.edges
+    succ: dict[str, set[str]] = {}
+    pred: dict[str, set[str]] = {}
+    for e in edges() if callable(edges) else edges:
+        src, tgt = (e.source, e.target) if hasattr(e, "source") else (e[0], e[1])
+        succ.setdefault(src, set()).add(tgt)
+        pred.setdefault(tgt, set()).add(src)
+    return succ, pred
+
+
+def _start_node(nodes: set[str]) -> str | None:
     for name in ("__start__", "start"):
         if name in nodes:
             return name
     return None
 
 
-def _end_node(G: Any) -> str | None:
-    nodes = list(G.nodes())
+def _end_node(nodes: set[str]) -> str | None:
     for name in ("__end__", "end"):
         if name in nodes:
             return name
@@ -36,7 +52,7 @@ def run_parallelism_checks() -> list[dict[str, Any]]:
 
     # 1. run_detectives and evidence_aggregator
     try:
-        nodes = set(G.nodes()) if G else set()
+        nodes = _node_ids(G) if G else set()
         expected = {"run_detectives", "evidence_aggregator"}
         passed = expected.issubset(nodes)
         results.append({
@@ -55,13 +71,19 @@ def run_parallelism_checks() -> list[dict[str, Any]]:
         })
         return results
 
+    try:
+        succ_map, pred_map = _adjacency(G)
+    except Exception as e:
+        results.append({"name": "Remaining checks (graph structure)", "passed": False, "message": str(e)})
+        return results
+
     # 2. START → run_detectives
     try:
-        start = _start_node(G)
+        start = _start_node(nodes)
         if not start:
             results.append({"name": "START → run_detectives", "passed": False, "message": "Could not find start node"})
         else:
-            succ = set(G.successors(start)) if hasattr(G, "successors") else {e[1] for e in G.edges() if e[0] == start}
+            succ = succ_map.get(start, set())
             passed = "run_detectives" in succ
             results.append({
                 "name": "START → run_detectives",
@@ -73,7 +95,7 @@ def run_parallelism_checks() -> list[dict[str, Any]]:
 
     # 3. run_detectives → evidence_aggregator
     try:
-        preds = set(G.predecessors("evidence_aggregator")) if hasattr(G, "predecessors") else {e[0] for e in G.edges() if e[1] == "evidence_aggregator"}
+        preds = pred_map.get("evidence_aggregator", set())
         passed = "run_detectives" in preds
         results.append({
             "name": "run_detectives → evidence_aggregator",
@@ -85,8 +107,8 @@ def run_parallelism_checks() -> list[dict[str, Any]]:
 
     # 4. evidence_aggregator has conditional edges (proceed/skip)
     try:
-        end = _end_node(G)
-        succ = set(G.successors("evidence_aggregator")) if hasattr(G, "successors") else {e[1] for e in G.edges() if e[0] == "evidence_aggregator"}
+        end = _end_node(nodes)
+        succ = succ_map.get("evidence_aggregator", set())
         passed = end is not None and (end in succ or "report_accuracy" in succ)
         results.append({
             "name": "evidence_aggregator → report_accuracy or END",
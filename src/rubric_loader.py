@@ -1,50 +1,67 @@
 """Shared rubric loader with process-level cache to avoid repeated disk reads."""
 
+import hashlib
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-_RUBRIC_CACHE: dict[str, Any] | None = None
-_RUBRIC_PATH: Path | None = None
-
 
+@lru_cache(maxsize=1)
 def _find_rubric_path() -> Path:
-    global _RUBRIC_PATH
-    if _RUBRIC_PATH is not None:
-        return _RUBRIC_PATH
     for p in (
         Path(__file__).resolve().parent.parent / "rubric.json",
         Path.cwd() / "rubric.json",
     ):
         if p.is_file():
-            _RUBRIC_PATH = p
             return p
-    _RUBRIC_PATH = Path(__file__).resolve().parent.parent / "rubric.json"
-    return _RUBRIC_PATH
+    return Path(__file__).resolve().parent.parent / "rubric.json"
 
 
+@lru_cache(maxsize=1)
 def get_rubric() -> dict[str, Any]:
-    """Return full rubric (dimensions + synthesis_rules). Cached per process."""
-    global _RUBRIC_CACHE
-    if _RUBRIC_CACHE is not None:
-        return _RUBRIC_CACHE
+    """Return full rubric (dimensions + synthesis_rules). Cached per process.
+
+    Uses the precompiled src/_rubric_data.py (scripts/compile_rubric.py) only while its recorded RUBRIC_SHA256 still
+    matches rubric.json; a stale or broken module falls back to parsing rubric.json.
+    """
+    try:
+        from src import _rubric_data as compiled
+    except Exception:
+        compiled = None
     path = _find_rubric_path()
-    if not path.is_file():
-        _RUBRIC_CACHE = {"dimensions": [], "synthesis_rules": {}}
-        return _RUBRIC_CACHE
     try:
-        _RUBRIC_CACHE = json.loads(path.read_text(encoding="utf-8"))
-        return _RUBRIC_CACHE
-    except (json.JSONDecodeError, OSError):
-        _RUBRIC_CACHE = {"dimensions": [], "synthesis_rules": {}}
-        return _RUBRIC_CACHE
+        raw = path.read_bytes()
+    except OSError:
+        if compiled is not None and isinstance(getattr(compiled, "RUBRIC", None), dict):
+            return compiled.RUBRIC
+        return {"dimensions": [], "synthesis_rules": {}}
+    if compiled is not None and getattr(compiled, "RUBRIC_SHA256", None) == hashlib.sha256(raw).hexdigest():
+        return compiled.RUBRIC
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return {"dimensions": [], "synthesis_rules": {}}
 
 
-def get_dimensions() -> list[dict[str, Any]]:
-    """Return rubric dimensions. Uses cached rubric."""
-    return get_rubric().get("dimensions", []) or []
+@lru_cache(maxsize=1)
+def get_dimensions() -> tuple[dict[str, Any], ...]:
+    """Return rubric dimensions as an immutable tuple. Cached per process."""
+    return tuple(get_rubric().get("dimensions", []) or [])
 
 
+@lru_cache(maxsize=1)
 def get_synthesis_rules() -> dict[str, str]:
-    """Return synthesis_rules. Uses cached rubric."""
+    """Return synthesis_rules. Cached per process."""
     return get_rubric().get("synthesis_rules") or {}
+
+
+def clear_rubric_cache() -> None:
+    """Drop cached rubric data so the next call reloads it (e.g. after editing rubric.json).
+
+    An edited rubric.json no longer matches the compiled module's hash, so the reload parses the JSON file.
+    """
+    _find_rubric_path.cache_clear()
+    get_rubric.cache_clear()
+    get_dimensions.cache_clear()
+    get_synthesis_rules.cache_clear()
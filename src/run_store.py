@@ -1,54 +1,120 @@
 """In-memory run store and background job runner. Enables async API: submit run, poll by run_id."""
 
+import asyncio
 import logging
 import threading
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import Any
 
-from src.config import get_max_concurrent_runs
+import orjson
+
+from src.config import get_max_concurrent_runs, get_max_stored_runs, get_run_ttl_seconds
 from src.llm_errors import LLMError
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
-_run_store: dict[str, dict[str, Any]] = {}
+_SWEEP_INTERVAL_SEC = 60
+
+_run_store: OrderedDict[str, dict[str, Any]] = OrderedDict()
 _store_lock = threading.Lock()
-_executor: ThreadPoolExecutor | None = None
-_semaphore: threading.Semaphore | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop that runs audits, starting it on first use (uvloop when installed)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="auditor_run_loop", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(_sweep_forever(), loop)
+            _loop = loop
+    return _loop
+
+
+def _is_finished(record: dict[str, Any]) -> bool:
+    return record["status"] in ("completed", "failed")
 
 
-def _get_executor() -> ThreadPoolExecutor:
-    global _executor
-    if _executor is None:
-        _executor = ThreadPoolExecutor(max_workers=get_max_concurrent_runs() + 2, thread_name_prefix="auditor_run")
-    return _executor
+def _evict_expired(now: float | None = None) -> int:
+    """Drop finished runs older than the TTL. Returns number of records removed."""
+    now = time.time() if now is None else now
+    cutoff = now - get_run_ttl_seconds()
+    with _store_lock:
+        expired = [
+            rid for rid, r in _run_store.items()
+            if _is_finished(r) and (r.get("finished_at") or now) < cutoff
+        ]
+        for rid in expired:
+            del _run_store[rid]
+    return len(expired)
+
+
+def _evict_over_capacity() -> None:
+    """Caller holds _store_lock. Evict least recently used finished runs until under the cap; pending/running runs are kept."""
+    overflow = len(_run_store) - get_max_stored_runs()
+    if overflow <= 0:
+        return
+    victims = [rid for rid, r in _run_store.items() if _is_finished(r)][:overflow]
+    for rid in victims:
+        del _run_store[rid]
+
+
+async def _sweep_forever() -> None:
+    while True:
+        await asyncio.sleep(_SWEEP_INTERVAL_SEC)
+        try:
+            removed = _evict_expired()
+            if removed:
+                logger.debug("Evicted %d expired run(s) from run store", removed)
+        except Exception:
+            logger.exception("Run store sweep failed")
 
 
-def _get_semaphore() -> threading.Semaphore:
+def _get_semaphore() -> asyncio.Semaphore:
+    """Concurrency gate for graph runs. Only touched from the background loop thread."""
     global _semaphore
     if _semaphore is None:
-        _semaphore = threading.Semaphore(get_max_concurrent_runs())
+        _semaphore = asyncio.Semaphore(get_max_concurrent_runs())
     return _semaphore
 
 
-def _execute_run(run_id: str, repo_url: str, pdf_path: str, rubric_dimensions: list[dict], report_type: str | None = None) -> None:
-    sem = _get_semaphore()
-    sem.acquire()
-    try:
+async def _invoke_graph(graph: Any, state_input: dict[str, Any], config: dict[str, Any]) -> dict[str, Any]:
+    """Prefer the graph's native ainvoke; fall back to running the sync invoke in the loop's executor."""
+    ainvoke = getattr(graph, "ainvoke", None)
+    if ainvoke is not None:
+        return await ainvoke(state_input, config=config)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: graph.invoke(state_input, config=config))
+
+
+async def _execute_run(run_id: str, repo_url: str, pdf_path: str, rubric_dimensions: list[dict], report_type: str | None = None) -> None:
+    async with _get_semaphore():
         with _store_lock:
             if run_id in _run_store:
                 _run_store[run_id]["status"] = "running"
         try:
             from src.graph import build_detective_graph
-            graph = build_detective_graph()
+            # Compiling the graph is synchronous; keep it off the loop so the sweeper and other runs keep going.
+            graph = await asyncio.get_running_loop().run_in_executor(None, build_detective_graph)
             state_input = {
                 "repo_url": repo_url,
                 "pdf_path": pdf_path,
                 "rubric_dimensions": rubric_dimensions,
                 "report_type": report_type or "self",  # Default to "self" if not provided
             }
-            state = graph.invoke(
+            state = await _invoke_graph(
+                graph,
                 state_input,
                 config={
                     "run_name": "LangGraph",
@@ -61,19 +127,27 @@ def _execute_run(run_id: str, repo_url: str, pdf_path: str, rubric_dimensions: l
             evidences = state.get("evidences") or {}
             final_report = state.get("final_report")
             if final_report is not None and hasattr(final_report, "model_dump"):
-                final_report = final_report.model_dump()
+                final_report = final_report.model_dump(mode="json")
             overall = None
             if isinstance(final_report, dict):
                 overall = final_report.get("overall_score")
             result = {
-                "evidences": {k: [e.model_dump() if hasattr(e, "model_dump") else e for e in v] for k, v in evidences.items()},
+                "evidences": {k: [e.model_dump(mode="json") if hasattr(e, "model_dump") else e for e in v] for k, v in evidences.items()},
                 "final_report": final_report,
                 "overall_score": overall,
             }
+            # Encode once here so GET /api/run/{run_id} can return bytes without re-walking the report. Only one form
+            # is stored; a result orjson cannot encode is kept as the dict instead of failing the finished run.
+            try:
+                result_json = orjson.dumps(result)
+            except TypeError:
+                logger.warning("Run %s result is not JSON-encodable; storing it unencoded", run_id, exc_info=True)
+                result_json = None
             with _store_lock:
                 if run_id in _run_store:
                     _run_store[run_id]["status"] = "completed"
-                    _run_store[run_id]["result"] = result
+                    _run_store[run_id]["result"] = result if result_json is None else None
+                    _run_store[run_id]["result_json"] = result_json
                     _run_store[run_id]["finished_at"] = time.time()
         except Exception as e:
             from src.llm_errors import user_message_for_exception
@@ -88,8 +162,6 @@ def _execute_run(run_id: str, repo_url: str, pdf_path: str, rubric_dimensions: l
                 logger.warning("Run %s failed (LLM): %s", run_id, e.message)
             else:
                 logger.exception("Run %s failed", run_id)
-    finally:
-        sem.release()
 
 
 def submit_run(repo_url: str, pdf_path: str, rubric_dimensions: list[dict], report_type: str | None = None) -> str:
@@ -99,18 +171,48 @@ def submit_run(repo_url: str, pdf_path: str, rubric_dimensions: list[dict], repo
         _run_store[run_id] = {
             "status": "pending",
             "result": None,
+            "result_json": None,
             "error": None,
             "created_at": time.time(),
             "finished_at": None,
         }
-    _get_executor().submit(_execute_run, run_id, repo_url, pdf_path, rubric_dimensions, report_type)
+        _evict_over_capacity()
+    future = asyncio.run_coroutine_threadsafe(
+        _execute_run(run_id, repo_url, pdf_path, rubric_dimensions, report_type),
+        _get_loop(),
+    )
+    future.add_done_callback(lambda f: _log_run_failure(run_id, f))
     return run_id
 
 
+def _log_run_failure(run_id: str, future: Future) -> None:
+    """Done-callback for a submitted run. _execute_run records its own failures, so anything surfacing here escaped
+    it: log it and mark the run failed so pollers do not wait on it forever."""
+    if future.cancelled():
+        logger.warning("Run %s was cancelled", run_id)
+        error = "Run was cancelled"
+    else:
+        exc = future.exception()
+        if exc is None:
+            return
+        logger.error("Run %s crashed outside its error handling", run_id, exc_info=exc)
+        error = f"Internal error: {exc}"[:500]
+    with _store_lock:
+        record = _run_store.get(run_id)
+        if record is not None and not _is_finished(record):
+            record["status"] = "failed"
+            record["error"] = error
+            record["finished_at"] = time.time()
+
+
 def get_run(run_id: str) -> dict[str, Any] | None:
-    """Return run record: status (pending|running|completed|failed), result, error."""
+    """Return run record: status (pending|running|completed|failed), error, and the result as either result_json
+    (pre-encoded JSON bytes, the usual case) or result (dict, when encoding failed)."""
     with _store_lock:
-        return _run_store.get(run_id)
+        record = _run_store.get(run_id)
+        if record is not None:
+            _run_store.move_to_end(run_id)
+        return record
 
 
 def get_run_status(run_id: str) -> str:
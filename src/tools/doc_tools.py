@@ -1,15 +1,32 @@
 """PDF ingestion and RAG-lite query for DocAnalyst."""
 
+import hashlib
 import io
+import json
+import mmap
+import multiprocessing
 import os
 import re
 import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
-from pypdf import PdfReader
+from src.config import get_pdf_cache_dir, get_pdf_cache_max_bytes, get_pdf_cache_ttl_seconds, get_pdf_text_workers
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 
 class DocIngestError(Exception):
@@ -17,6 +34,7 @@ class DocIngestError(Exception):
 
 
 PDF_MAGIC = b"%PDF"
+_USER_AGENT = "Mozilla/5.0 (compatible; AutomatonAuditor/1.0)"
 
 # Google Drive view URL -> direct download (export=download returns PDF bytes when possible)
 _DRIVE_FILE_ID_RE = re.compile(
@@ -42,6 +60,15 @@ def _is_pdf_bytes(data: bytes) -> bool:
     return len(data) >= 4 and data[:4] == PDF_MAGIC
 
 
+def _file_has_pdf_magic(path: Path) -> bool:
+    """Peek the first 4 bytes through a raw fd (no buffered file object). Raises OSError if unreadable."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return _is_pdf_bytes(os.read(fd, 4))
+    finally:
+        os.close(fd)
+
+
 def pdf_url_reachable(url: str, timeout: int = 10) -> bool:
     """Return True if URL returns 200 and body looks like PDF (magic bytes). Handles 404, timeouts, redirects."""
     s = (url or "").strip()
@@ -50,7 +77,7 @@ def pdf_url_reachable(url: str, timeout: int = 10) -> bool:
     drive_url = _google_drive_download_url(s)
     u = drive_url or s
     try:
-        req = Request(u, headers={"User-Agent": "Mozilla/5.0 (compatible; AutomatonAuditor/1.0)"})
+        req = Request(u, headers={"User-Agent": _USER_AGENT})
         with urlopen(req, timeout=timeout) as resp:
             data = resp.read(8)
         return _is_pdf_bytes(data)
@@ -60,18 +87,171 @@ def pdf_url_reachable(url: str, timeout: int = 10) -> bool:
         return False
 
 
-def pdf_to_binary(pdf_path: str) -> bytes:
-    """Resolve PDF to binary once: download URL (with Drive handling) or read local file. Use same bytes for ingest and image extraction."""
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+_HTML_SNIFF_LIMIT = 1024 * 1024
+
+
+def _read_pdf_body(resp: Any, sniff_html: bool = False) -> bytes | bytearray:
+    """Read a response body in 256 KB blocks, into a buffer presized from Content-Length when given. The buffer itself
+    is returned (a bytearray, never copied into bytes) so peak memory stays at one body.
+    A body that does not start with %PDF stops early: only the first block is returned, or up to 1 MB more
+    when sniff_html is set (Google Drive interstitials carry their confirm token in the HTML)."""
+    first = resp.read(_DOWNLOAD_CHUNK_SIZE)
+    if not _is_pdf_bytes(first):
+        return first + resp.read(_HTML_SNIFF_LIMIT) if sniff_html else first
+    try:
+        length = int(resp.headers.get("Content-Length") or 0)
+    except ValueError:
+        length = 0
+    if length <= len(first):
+        buf = bytearray(first)
+        while chunk := resp.read(_DOWNLOAD_CHUNK_SIZE):
+            buf += chunk
+        return buf
+    buf = bytearray(length)
+    with memoryview(buf) as view:
+        view[:len(first)] = first
+        pos = len(first)
+        while pos < length:
+            with view[pos:pos + _DOWNLOAD_CHUNK_SIZE] as window:
+                n = resp.readinto(window)
+            if not n:
+                break
+            pos += n
+    # The view is released, so a short body can be truncated in place.
+    del buf[pos:]
+    return buf
+
+
+# Wall clock for cache freshness and pruning; module-level so tests can move time without patching time.time.
+_cache_clock = time.time
+
+
+def _pdf_cache_paths(url: str) -> tuple[Path, Path] | None:
+    """(pdf, metadata) paths for a URL in the download cache, or None when caching is disabled."""
+    cache_dir = get_pdf_cache_dir()
+    if cache_dir is None:
+        return None
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.pdf", cache_dir / f"{key}.json"
+
+
+def _read_cached_pdf(url: str, revalidate: bool) -> bytes | None:
+    """Cached bytes for url if still fresh: ETag/Last-Modified must match a HEAD response when stored (and revalidate
+    is set); otherwise the entry is reused for AUDITOR_PDF_CACHE_TTL seconds. Any failure means a cache miss."""
+    paths = _pdf_cache_paths(url)
+    if paths is None:
+        return None
+    pdf_file, meta_file = paths
+    try:
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    validators = {h: meta[k] for h, k in (("ETag", "etag"), ("Last-Modified", "last_modified")) if meta.get(k)}
+    if revalidate and validators:
+        try:
+            req = Request(url, method="HEAD", headers={"User-Agent": _USER_AGENT})
+            with urlopen(req, timeout=10) as resp:
+                fresh = all(resp.headers.get(h) == v for h, v in validators.items())
+        except (URLError, OSError, TimeoutError):
+            return None
+    else:
+        fresh = _cache_clock() - float(meta.get("fetched_at") or 0) < get_pdf_cache_ttl_seconds()
+    if not fresh:
+        return None
+    try:
+        data = pdf_file.read_bytes()
+        # mtime doubles as last use, so pruning keeps entries that are still being hit.
+        os.utime(pdf_file)
+    except OSError:
+        return None
+    return data if _is_pdf_bytes(data) else None
+
+
+def _write_cached_pdf(url: str, data: bytes, headers: Any) -> None:
+    """Store a downloaded PDF and its validators; temp file + os.replace so readers never see a partial file."""
+    paths = _pdf_cache_paths(url)
+    if paths is None:
+        return
+    pdf_file, meta_file = paths
+    meta = {
+        "url": url,
+        "etag": headers.get("ETag") if headers is not None else None,
+        "last_modified": headers.get("Last-Modified") if headers is not None else None,
+        "fetched_at": _cache_clock(),
+    }
+    try:
+        pdf_file.parent.mkdir(parents=True, exist_ok=True)
+        for target, payload in ((pdf_file, data), (meta_file, json.dumps(meta).encode("utf-8"))):
+            with tempfile.NamedTemporaryFile(dir=target.parent, suffix=".tmp", delete=False) as tmp:
+                tmp.write(payload)
+            os.replace(tmp.name, target)
+    except OSError:
+        return
+    _prune_pdf_cache(pdf_file.parent, keep=pdf_file)
+
+
+def _prune_pdf_cache(cache_dir: Path, keep: Path) -> None:
+    """Drop entries unused for AUDITOR_PDF_CACHE_TTL seconds, orphaned metadata and stale temp files, then evict
+    the least recently used entries until the cache fits AUDITOR_PDF_CACHE_MAX_MB. keep (just written) stays."""
+    now = _cache_clock()
+    ttl = get_pdf_cache_ttl_seconds()
+    entries: list[tuple[float, int, Path]] = []
+    try:
+        for path in cache_dir.iterdir():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                if now - st.st_mtime > 3600:
+                    path.unlink(missing_ok=True)
+            elif path.suffix == ".json" and not path.with_suffix(".pdf").exists():
+                path.unlink(missing_ok=True)
+            elif path.suffix == ".pdf" and path != keep:
+                if now - st.st_mtime > ttl:
+                    _remove_cache_entry(path)
+                else:
+                    entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries) + keep.stat().st_size
+    except OSError:
+        return
+    budget = get_pdf_cache_max_bytes()
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        _remove_cache_entry(path)
+        total -= size
+
+
+def _remove_cache_entry(pdf_file: Path) -> None:
+    for path in (pdf_file, pdf_file.with_suffix(".json")):
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def pdf_to_binary(pdf_path: str) -> bytes | bytearray:
+    """Resolve PDF to binary once: download URL (with Drive handling) or read local file. Use same bytes for ingest and image extraction.
+
+    URL downloads are cached on disk (see _read_cached_pdf); Drive links have no stable validators, so they expire by TTL.
+    A fresh download is returned as the bytearray it was read into, so it is never copied.
+    """
     s = (pdf_path or "").strip()
     if s.startswith("http://") or s.startswith("https://"):
         url = s
         drive_url = _google_drive_download_url(s)
         if drive_url:
             url = drive_url
-        req = Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; AutomatonAuditor/1.0)"})
+        cached = _read_cached_pdf(s, revalidate=not drive_url)
+        if cached is not None:
+            return cached
+        req = Request(url, headers={"User-Agent": _USER_AGENT})
         try:
             with urlopen(req, timeout=60) as resp:
-                data = resp.read()
+                data = _read_pdf_body(resp, sniff_html=bool(drive_url))
+                headers = resp.headers
         except HTTPError as e:
             if e.code == 404:
                 raise DocIngestError(f"PDF not found (404): {pdf_path!r}")
@@ -83,14 +263,16 @@ def pdf_to_binary(pdf_path: str) -> bytes:
                 confirm = re.search(rb"confirm=([0-9A-Za-z_-]+)", data)
                 if confirm:
                     url2 = url + "&confirm=" + confirm.group(1).decode("utf-8", errors="replace")
-                    req2 = Request(url2, headers={"User-Agent": "Mozilla/5.0 (compatible; AutomatonAuditor/1.0)"})
+                    req2 = Request(url2, headers={"User-Agent": _USER_AGENT})
                     with urlopen(req2, timeout=60) as r2:
-                        data = r2.read()
+                        data = _read_pdf_body(r2)
+                        headers = r2.headers
             if not _is_pdf_bytes(data):
                 raise DocIngestError(
                     "URL did not return a PDF (response may be HTML or an error page). "
                     "For Google Drive, use a share link that allows 'Anyone with the link' to view."
                 )
+        _write_cached_pdf(s, data, None if drive_url else headers)
         return data
     path = Path(s)
     if not path.exists() or not path.is_file():
@@ -114,6 +296,94 @@ def _resolve_pdf_path(pdf_path: str) -> Path:
     return Path(s)
 
 
+_DOC_CACHE_SIZE = 8
+
+
+class _CachedDoc:
+    """A cached fitz document plus its bookkeeping; users and evicted are guarded by _doc_cache_lock."""
+
+    __slots__ = ("doc", "lock", "users", "evicted")
+
+    def __init__(self, doc: Any) -> None:
+        self.doc = doc
+        self.lock = threading.Lock()
+        self.users = 0
+        self.evicted = False
+
+
+_doc_cache: OrderedDict[str, _CachedDoc] = OrderedDict()
+_doc_cache_lock = threading.Lock()
+
+
+def _doc_cache_key(data: bytes | Path) -> str:
+    if isinstance(data, Path):
+        st = data.stat()
+        return f"file:{data.resolve()}:{st.st_mtime_ns}:{st.st_size}"
+    return hashlib.sha1(data).hexdigest()
+
+
+def _drop_cached_doc(entry: _CachedDoc) -> None:
+    """Caller holds _doc_cache_lock. Close an entry removed from the cache now, or when its last user is done."""
+    entry.evicted = True
+    if entry.users == 0:
+        entry.doc.close()
+
+
+@contextmanager
+def _fitz_document(data: bytes | Path) -> Iterator[Any]:
+    """Yield a fitz document for data, parsed once per content so consecutive calls (ingest, then image extraction)
+    share it.
+
+    Bytes are keyed by sha1. Local files are keyed by path, mtime and size, and fitz reads them from a read-only
+    mmap (zero-copy memoryview), so the file is never copied into a Python bytes object and the page cache is reused.
+    MuPDF documents are not safe to use from two threads at once, so the document is held under its own lock while
+    yielded: concurrent runs on the same PDF take turns instead of parsing it twice. Eviction and
+    release_pdf_documents close a document as soon as no caller is inside this block.
+    """
+    import fitz
+    key = _doc_cache_key(data)
+    with _doc_cache_lock:
+        entry = _doc_cache.get(key)
+        if entry is not None:
+            _doc_cache.move_to_end(key)
+            entry.users += 1
+    if entry is None:
+        # fitz keeps bytes and memoryviews as they are but copies a bytearray (a download buffer) into new bytes.
+        doc = fitz.open(stream=_map_file(data) if isinstance(data, Path) else memoryview(data), filetype="pdf")
+        with _doc_cache_lock:
+            entry = _doc_cache.get(key)
+            if entry is None:
+                entry = _doc_cache[key] = _CachedDoc(doc)
+                while len(_doc_cache) > _DOC_CACHE_SIZE:
+                    _drop_cached_doc(_doc_cache.popitem(last=False)[1])
+            else:
+                # Another thread opened the same PDF meanwhile; use its copy.
+                doc.close()
+            entry.users += 1
+    try:
+        with entry.lock:
+            yield entry.doc
+    finally:
+        with _doc_cache_lock:
+            entry.users -= 1
+            if entry.evicted and entry.users == 0:
+                entry.doc.close()
+
+
+def _map_file(path: Path) -> memoryview:
+    """Read-only memory map of a file; the mapping lives as long as the returned view (kept alive by the fitz doc)."""
+    with path.open("rb") as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def release_pdf_documents() -> None:
+    """Drop all cached fitz documents (call once a run is done with its PDF); documents in use close when released."""
+    with _doc_cache_lock:
+        for entry in _doc_cache.values():
+            _drop_cached_doc(entry)
+        _doc_cache.clear()
+
+
 DEFAULT_CHUNK_SIZE = 800
 DEFAULT_CHUNK_OVERLAP = 100
 
@@ -135,53 +405,184 @@ def ingest_pdf(
     max_pages: int = 80,
 ) -> list[dict[str, Any]]:
     """Parse PDF and return chunked text. Prefer pdf_bytes (binary) when provided so one load is reused. max_pages caps processing for large PDFs."""
+    return list(iter_chunks(pdf_path, pdf_bytes, chunk_size, overlap, max_pages))
+
+
+def iter_chunks(
+    pdf_path: str | None = None,
+    pdf_bytes: bytes | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_pages: int = 80,
+) -> Iterator[dict[str, Any]]:
+    """Generator form of ingest_pdf: yields {text, page, chunk_index} dicts page by page so single-pass consumers
+    (e.g. query_chunks) never hold every chunk at once. Errors surface on first iteration."""
+    source = _pdf_source(pdf_path, pdf_bytes)
+    page_texts, page_count = _extract_page_texts(source, max_pages)
+    emitted = False
+    for i, text in enumerate(page_texts):
+        if text.strip():
+            for j, block in enumerate(_chunk_text(text, chunk_size, overlap)):
+                emitted = True
+                yield {"text": block, "page": i + 1, "chunk_index": j}
+
+    if not emitted:
+        if page_count == 0:
+            raise DocIngestError("No text extracted from PDF")
+        yield {
+            "text": f"PDF has {page_count} page(s). No extractable text (content may be image-based or scanned).",
+            "page": 1,
+            "chunk_index": 0,
+        }
+
+
+def _pdf_source(pdf_path: str | None, pdf_bytes: bytes | None) -> Path | bytes:
+    """Validated PDF source for text extraction: the bytes when they look like a PDF, else the resolved local path."""
     if pdf_bytes is not None and _is_pdf_bytes(pdf_bytes):
-        stream = io.BytesIO(pdf_bytes)
-        reader = PdfReader(stream)
-    else:
-        if not pdf_path:
-            raise DocIngestError("Either pdf_path or pdf_bytes required")
-        path = _resolve_pdf_path(pdf_path)
-        if not path.exists() or not path.is_file():
-            raise DocIngestError(f"PDF not found: {pdf_path}")
-        try:
-            with path.open("rb") as f:
-                if not _is_pdf_bytes(f.read(4)):
-                    raise DocIngestError(f"Not a valid PDF: {pdf_path}")
-        except DocIngestError:
-            raise
-        except OSError as e:
-            raise DocIngestError(f"Cannot read file: {e}") from e
-        try:
-            reader = PdfReader(str(path))
-        except Exception as e:
-            raise DocIngestError(f"Cannot parse PDF: {e}") from e
+        return pdf_bytes
+    if not pdf_path:
+        raise DocIngestError("Either pdf_path or pdf_bytes required")
+    path = _resolve_pdf_path(pdf_path)
+    if not path.exists() or not path.is_file():
+        raise DocIngestError(f"PDF not found: {pdf_path}")
+    try:
+        is_pdf = _file_has_pdf_magic(path)
+    except OSError as e:
+        raise DocIngestError(f"Cannot read file: {e}") from e
+    if not is_pdf:
+        raise DocIngestError(f"Not a valid PDF: {pdf_path}")
+    return path
+
+
+PARALLEL_TEXT_MIN_PAGES = 16
+PAGES_PER_TEXT_TASK = 8
+
+_text_pool: ProcessPoolExecutor | None = None
+_text_pool_lock = threading.Lock()
+
+
+def _get_text_pool() -> ProcessPoolExecutor:
+    global _text_pool
+    with _text_pool_lock:
+        if _text_pool is None:
+            # spawn, not fork: callers run in worker threads and MuPDF state must not be forked mid-use.
+            _text_pool = ProcessPoolExecutor(
+                max_workers=get_pdf_text_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _text_pool
+
+
+def _discard_text_pool() -> None:
+    global _text_pool
+    with _text_pool_lock:
+        pool, _text_pool = _text_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _plain_page_text(page: Any) -> str:
+    """Plain text of a fitz page with the leanest useful flags: keep whitespace and clip to the mediabox, but skip
+    ligature preservation and CID fallbacks (ligatures expand to plain letters, which also helps term matching)."""
+    import fitz
+    return page.get_text("text", flags=fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP) or ""
+
+
+def _page_texts_worker(path_str: str, page_indices: list[int]) -> list[tuple[int, str]]:
+    """Process-pool task: open the PDF in this process and return (page index, text) for the given pages."""
+    import fitz
+    out: list[tuple[int, str]] = []
+    doc = fitz.open(path_str)
+    try:
+        for i in page_indices:
+            try:
+                out.append((i, _plain_page_text(doc[i])))
+            except Exception:
+                out.append((i, ""))
+    finally:
+        doc.close()
+    return out
+
+
+def _extract_page_texts_parallel(source: Path | bytes, n: int) -> list[str] | None:
+    """Extract the first n pages across the process pool in batches. Returns None if the pool is unusable."""
+    tmp_path: str | None = None
+    try:
+        if not isinstance(source, Path):
+            # Workers get a file path rather than the bytes so the PDF is not pickled once per batch.
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                tmp.write(source)
+                tmp_path = tmp.name
+            path_str = tmp_path
+        else:
+            path_str = str(source)
+        batches = [list(range(i, min(i + PAGES_PER_TEXT_TASK, n))) for i in range(0, n, PAGES_PER_TEXT_TASK)]
+        texts = [""] * n
+        for part in _get_text_pool().map(_page_texts_worker, [path_str] * len(batches), batches):
+            for i, text in part:
+                texts[i] = text
+        return texts
+    except BrokenProcessPool:
+        _discard_text_pool()
+        return None
+    except Exception:
+        return None
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
 
-    chunks: list[dict[str, Any]] = []
+def _extract_page_texts(source: Path | bytes, max_pages: int) -> tuple[list[str], int]:
+    """Return (text per page up to max_pages, total page count). PyMuPDF (MuPDF C engine); pypdf only if fitz is missing.
+    PDFs with at least PARALLEL_TEXT_MIN_PAGES pages are split across a process pool."""
+    try:
+        import fitz
+    except ImportError:
+        return _extract_page_texts_pypdf(source, max_pages)
+    try:
+        with _fitz_document(source) as doc:
+            page_count = doc.page_count
+            n = min(page_count, max_pages) if max_pages else page_count
+            if n >= PARALLEL_TEXT_MIN_PAGES and get_pdf_text_workers() > 1:
+                texts = _extract_page_texts_parallel(source, n)
+                if texts is not None:
+                    return texts, page_count
+            texts: list[str] = []
+            for i in range(n):
+                try:
+                    texts.append(_plain_page_text(doc[i]))
+                except Exception:
+                    texts.append("")
+            return texts, page_count
+    except Exception as e:
+        raise DocIngestError(f"Cannot parse PDF: {e}") from e
+
+
+def _extract_page_texts_pypdf(source: Path | bytes, max_pages: int) -> tuple[list[str], int]:
+    """Fallback text extraction with pypdf for environments without PyMuPDF."""
+    from pypdf import PdfReader
+    try:
+        reader = PdfReader(str(source)) if isinstance(source, Path) else PdfReader(io.BytesIO(source))
+    except Exception as e:
+        raise DocIngestError(f"Cannot parse PDF: {e}") from e
     pages = reader.pages[:max_pages] if max_pages else reader.pages
-    for i, page in enumerate(pages):
+    texts: list[str] = []
+    for page in pages:
         try:
-            text = page.extract_text() or ""
+            texts.append(page.extract_text() or "")
         except Exception:
-            text = ""
-        if text.strip():
-            page_chunks = _chunk_text(text, chunk_size, overlap)
-            for j, block in enumerate(page_chunks):
-                chunks.append({"text": block, "page": i + 1, "chunk_index": j})
+            texts.append("")
+    return texts, len(reader.pages)
 
-    if not chunks and len(reader.pages) > 0:
-        chunks.append({
-            "text": f"PDF has {len(reader.pages)} page(s). No extractable text (content may be image-based or scanned).",
-            "page": 1,
-            "chunk_index": 0,
-        })
-    if not chunks:
-        raise DocIngestError("No text extracted from PDF")
-    return chunks
+
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
 
 
 def _chunk_text(text: str, size: int, overlap: int) -> list[str]:
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    paragraphs = [p for p in map(str.strip, _PARA_SPLIT_RE.split(text)) if p]
     if not paragraphs:
         return _chunk_by_size(text, size, overlap)
     result: list[str] = []
@@ -191,15 +592,13 @@ def _chunk_text(text: str, size: int, overlap: int) -> list[str]:
         if current_len + len(p) + 2 > size and current:
             result.append("\n\n".join(current))
             if overlap > 0 and current:
-                keep = []
+                # Longest tail of paragraphs that fits in the overlap budget; sliced once, no list.insert(0).
+                cut = len(current)
                 keep_len = 0
-                for s in reversed(current):
-                    if keep_len + len(s) + 2 <= overlap:
-                        keep.insert(0, s)
-                        keep_len += len(s) + 2
-                    else:
-                        break
-                current = keep
+                while cut > 0 and keep_len + len(current[cut - 1]) + 2 <= overlap:
+                    cut -= 1
+                    keep_len += len(current[cut]) + 2
+                current = current[cut:]
                 current_len = keep_len
             else:
                 current = []
@@ -212,13 +611,16 @@ def _chunk_text(text: str, size: int, overlap: int) -> list[str]:
 
 
 def _chunk_by_size(text: str, size: int, overlap: int) -> list[str]:
+    """Fixed-size windows broken at the last space inside each window. rfind only scans the current window,
+    so the pass is linear overall (a precomputed space index + bisect measured ~10x slower)."""
     if not text.strip():
         return []
+    n = len(text)
     result = []
     start = 0
-    while start < len(text):
-        end = min(start + size, len(text))
-        if end < len(text):
+    while start < n:
+        end = min(start + size, n)
+        if end < n:
             break_at = text.rfind(" ", start, end)
             if break_at > start:
                 end = break_at + 1
@@ -249,24 +651,86 @@ def _terms_from_forensic_instruction(instruction: str) -> list[str]:
     return out if out else list(THEORETICAL_DEPTH_TERMS)
 
 
-def query_chunks(chunks: list[dict[str, Any]], terms: tuple[str, ...] | list[str] | None = None) -> list[dict[str, Any]]:
+_BYTES_SCAN_MAX_TERMS = 16
+
+
+@lru_cache(maxsize=64)
+def _terms_matcher(terms: tuple[str, ...]) -> Callable[[str], set[str]] | None:
+    """Build a case-insensitive scanner for all terms longer than 2 chars; returns the lowercased terms hit.
+
+    Small ASCII term sets (the rubric default) are searched with bytes containment on the lowercased UTF-8 haystack,
+    which is CPython's C fastsearch and beat both alternatives below on the bundled reports. Otherwise an Aho-Corasick
+    automaton (pyahocorasick) is used when installed, else a single compiled regex. The regex puts the longest-first
+    alternation in a lookahead so every start position reports its longest hit; a shorter term starting there is a
+    prefix of that hit.
+    """
+    alts = sorted({t.lower() for t in terms if len(t) > 2}, key=len, reverse=True)
+    if not alts:
+        return None
+    if len(alts) <= _BYTES_SCAN_MAX_TERMS and all(t.isascii() for t in alts):
+        needles = [(t, t.encode("ascii")) for t in alts]
+
+        def scan_bytes(text: str) -> set[str]:
+            # bytes.lower() only folds ASCII letters, which is all an ASCII needle can match.
+            hay = text.encode("utf-8", "ignore").lower()
+            return {t for t, b in needles if b in hay}
+
+        return scan_bytes
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for t in alts:
+            automaton.add_word(t, t)
+        automaton.make_automaton()
+
+        def scan_ac(text: str) -> set[str]:
+            return {t for _, t in automaton.iter(text.lower())}
+
+        return scan_ac
+    pattern = re.compile("(?=(" + "|".join(re.escape(t) for t in alts) + "))", re.IGNORECASE)
+
+    def scan_re(text: str) -> set[str]:
+        hits = {m.group(1).lower() for m in pattern.finditer(text)}
+        return {t for t in alts if any(h.startswith(t) for h in hits)} if hits else hits
+
+    return scan_re
+
+
+class ChunkQueryResult(NamedTuple):
+    matches: list[dict[str, Any]]
+    terms_seen: set[str]
+
+
+def query_chunks(chunks: Iterable[dict[str, Any]], terms: tuple[str, ...] | list[str] | None = None) -> list[dict[str, Any]]:
     """Search chunks for terms; case-insensitive and flexible (e.g. Fan-In / Fan-Out vs Fan-In/Fan-Out)."""
+    return query_chunks_with_terms(chunks, terms).matches
+
+
+def query_chunks_with_terms(chunks: Iterable[dict[str, Any]], terms: tuple[str, ...] | list[str] | None = None) -> ChunkQueryResult:
+    """query_chunks plus the set of distinct terms matched anywhere, collected during the same pass."""
     if terms is None:
         terms = THEORETICAL_DEPTH_TERMS
-    terms = list(terms)
+    terms = tuple(terms)
+    scan = _terms_matcher(terms)
+    lowered = [(t, t.lower()) for t in terms]
     matches: list[dict[str, Any]] = []
+    terms_seen: set[str] = set()
     for c in chunks:
         text = c.get("text") or ""
-        text_lower = text.lower()
-        found_terms = [t for t in terms if t in text or (len(t) > 2 and t.lower() in text_lower)]
+        hits = scan(text) if scan else set()
+        # Terms of 2 chars or fewer stay case-sensitive, as before.
+        found_terms = [t for t, tl in lowered if (tl in hits if len(t) > 2 else t in text)]
         if not found_terms:
             continue
+        terms_seen.update(found_terms)
         matches.append({
             **c,
             "matched_terms": found_terms,
             "excerpt": text[:500] + ("..." if len(text) > 500 else ""),
         })
-    return matches
+    return ChunkQueryResult(matches, terms_seen)
+
+
+_SENTENCE_END_RE = re.compile(r"\.")
 
 
 def search_theoretical_depth(
@@ -277,27 +741,29 @@ def search_theoretical_depth(
 ) -> dict[str, Any]:
     """RAG-lite search for theoretical_depth: terms from rubric (or default). Optional success/failure for LLM."""
     search_terms = tuple(terms) if terms else THEORETICAL_DEPTH_TERMS
-    matches = query_chunks(chunks, search_terms)
+    matches, terms_seen = query_chunks_with_terms(chunks, search_terms)
     sentences_with_terms: list[str] = []
+    seen_sentences: set[str] = set()
     for m in matches:
         text = m.get("text") or ""
+        # Period offsets once per chunk; each term's sentence bounds are then two bisects instead of two scans.
+        dots = [d.start() for d in _SENTENCE_END_RE.finditer(text)]
         for term in m.get("matched_terms", []):
             start = text.find(term)
             if start == -1:
                 continue
-            begin = max(0, text.rfind(".", 0, start) + 1)
-            end = text.find(".", start + len(term))
-            if end == -1:
-                end = len(text)
-            else:
-                end += 1
+            i = bisect_left(dots, start)
+            begin = dots[i - 1] + 1 if i else 0
+            j = bisect_left(dots, start + len(term))
+            end = dots[j] + 1 if j < len(dots) else len(text)
             sentence = text[begin:end].strip()
-            if sentence and sentence not in sentences_with_terms:
+            if sentence and sentence not in seen_sentences:
+                seen_sentences.add(sentence)
                 sentences_with_terms.append(sentence)
     result: dict[str, Any] = {
         "matched_chunks": matches,
         "sentences_with_terms": sentences_with_terms,
-        "term_count": len(set(t for m in matches for t in m.get("matched_terms", []))),
+        "term_count": len(terms_seen),
         "in_detailed_explanation": len(sentences_with_terms) > 0 and any(len(s) > 80 for s in sentences_with_terms),
     }
     try:
@@ -310,13 +776,15 @@ def search_theoretical_depth(
         )
         llm = get_doc_llm()
         if llm:
-            context = "\n\n".join((c.get("text", "") or "")[:400] for c in chunks[:8])
-            prompt = f"""Given this PDF excerpt, assess theoretical depth (terms: {', '.join(search_terms[:6])}). Reply in 1-2 sentences."""
+            terms_label = ", ".join(search_terms[:6])
+            parts = [f"Given this PDF excerpt, assess theoretical depth (terms: {terms_label}). Reply in 1-2 sentences."]
             if success_pattern:
-                prompt += f" Success looks like: {success_pattern[:150]}."
+                parts.append(f" Success looks like: {success_pattern[:150]}.")
             if failure_pattern:
-                prompt += f" Avoid: {failure_pattern[:150]}."
-            prompt += f"\n\nExcerpt:\n\n{context}"""
+                parts.append(f" Avoid: {failure_pattern[:150]}.")
+            parts.append("\n\nExcerpt:\n\n")
+            parts.append("\n\n".join((c.get("text", "") or "")[:400] for c in chunks[:8]))
+            prompt = "".join(parts)
             response = llm.invoke(prompt)
             if hasattr(response, "content") and response.content:
                 result["llm_rationale"] = response.content.strip()
@@ -330,17 +798,15 @@ def search_theoretical_depth(
     return result
 
 
+_PATH_RE = re.compile(
+    r"(?:^|[\s`'\"])((?:src|tests|scripts)/[a-zA-Z0-9_/.-]+\.(?:py|json|md|toml)|[a-zA-Z0-9_/.-]+\.(?:py|json|md|toml))(?:[\s`'\"]|$)"
+)
+
+
 def extract_file_paths_from_text(text: str) -> list[str]:
     """Extract file-path-like strings (e.g. src/state.py) from text for cross-reference."""
-    import re
-    seen: set[str] = set()
-    out: list[str] = []
-    for m in re.finditer(r"(?:^|[\s`'\"])((?:src|tests|scripts)/[a-zA-Z0-9_/.-]+\.(?:py|json|md|toml)|[a-zA-Z0-9_/.-]+\.(?:py|json|md|toml))(?:[\s`'\"]|$)", text):
-        p = m.group(1).strip("`'\"")
-        if p not in seen and len(p) > 2:
-            seen.add(p)
-            out.append(p)
-    return out
+    paths = (m.group(1).strip("`'\"") for m in _PATH_RE.finditer(text))
+    return list(dict.fromkeys(p for p in paths if len(p) > 2))
 
 
 def extract_images_from_pdf(pdf_path: str | None = None, pdf_bytes: bytes | None = None) -> list[dict[str, Any]]:
@@ -353,9 +819,8 @@ def extract_images_from_pdf(pdf_path: str | None = None, pdf_bytes: bytes | None
             path = _resolve_pdf_path(pdf_path)
             if not path.exists() or not path.is_file():
                 return []
-            with path.open("rb") as f:
-                if not _is_pdf_bytes(f.read(4)):
-                    return []
+            if not _file_has_pdf_magic(path):
+                return []
             source = path
         except (DocIngestError, OSError):
             return []
@@ -364,102 +829,116 @@ def extract_images_from_pdf(pdf_path: str | None = None, pdf_bytes: bytes | None
 
     result: list[dict[str, Any]] = []
     try:
-        result = _extract_images_fitz(source)
+        with _fitz_document(source) as doc:
+            try:
+                result = _extract_images_fitz(doc)
+            except Exception:
+                pass
+            if not result:
+                try:
+                    result = _render_pages_as_images_fitz(doc)
+                except Exception:
+                    pass
+            _filter_and_limit_images(result, doc)
     except Exception:
-        pass
-    if not result:
-        try:
-            result = _render_pages_as_images_fitz(source)
-        except Exception:
-            pass
-    _filter_and_limit_images(result)
+        return []
     return result
 
 
-def _extract_images_fitz(source: Path | bytes) -> list[dict[str, Any]]:
-    """Image extraction via PyMuPDF only: fitz.open, page.get_images(), doc.extract_image(xref)."""
-    import fitz
+def _extract_images_fitz(doc: Any) -> list[dict[str, Any]]:
+    """Image extraction via PyMuPDF only: page.get_images(), doc.extract_image(xref). Records keep their xref."""
     out: list[dict[str, Any]] = []
     seen_xrefs: set[int] = set()
     min_side = 60
-    if isinstance(source, bytes):
-        doc = fitz.open(stream=source, filetype="pdf")
-    else:
-        doc = fitz.open(str(source))
-    try:
-        for page in doc:
-            page_num = page.number + 1
-            for item in page.get_images():
-                xref = item[0]
-                if xref in seen_xrefs:
+    for page in doc:
+        page_num = page.number + 1
+        for item in page.get_images():
+            xref = item[0]
+            if xref in seen_xrefs:
+                continue
+            seen_xrefs.add(xref)
+            try:
+                info = doc.extract_image(xref)
+                if not info:
                     continue
-                seen_xrefs.add(xref)
-                try:
-                    info = doc.extract_image(xref)
-                    if not info:
-                        continue
-                    data = info.get("image")
-                    w = info.get("width") or 0
-                    h = info.get("height") or 0
-                    if not data or len(data) < 100:
-                        continue
-                    if w < min_side and h < min_side:
-                        continue
-                    ext = (info.get("ext") or "png").lower()
-                    if ext == "jpeg":
-                        ext = "jpg"
-                    out.append({
-                        "page": page_num,
-                        "data": bytes(data),
-                        "name": f"page{page_num}_xref{xref}.{ext}",
-                        "ext": ext,
-                    })
-                except Exception:
+                data = info.get("image")
+                w = info.get("width") or 0
+                h = info.get("height") or 0
+                if not data or len(data) < 100:
                     continue
-    finally:
-        doc.close()
+                if w < min_side and h < min_side:
+                    continue
+                ext = (info.get("ext") or "png").lower()
+                if ext == "jpeg":
+                    ext = "jpg"
+                out.append({
+                    "page": page_num,
+                    "data": bytes(data),
+                    "name": f"page{page_num}_xref{xref}.{ext}",
+                    "ext": ext,
+                    "xref": xref,
+                })
+            except Exception:
+                continue
     return out
 
 
-def _render_pages_as_images_fitz(source: Path | bytes) -> list[dict[str, Any]]:
+def _render_pages_as_images_fitz(doc: Any) -> list[dict[str, Any]]:
     """When no embedded images: render each page as PNG using fitz (PyMuPDF) only."""
-    import fitz
     out: list[dict[str, Any]] = []
-    if isinstance(source, bytes):
-        doc = fitz.open(stream=source, filetype="pdf")
-    else:
-        doc = fitz.open(str(source))
-    try:
-        for page in doc:
-            pix = page.get_pixmap(dpi=150, alpha=False)
-            data = pix.tobytes("png")
-            if data and len(data) >= 100:
-                out.append({"page": page.number + 1, "data": data, "name": f"page{page.number + 1}_rendered.png", "ext": "png"})
-    finally:
-        doc.close()
+    for page in doc:
+        pix = page.get_pixmap(dpi=150, alpha=False)
+        data = pix.tobytes("png")
+        if data and len(data) >= 100:
+            out.append({"page": page.number + 1, "data": data, "name": f"page{page.number + 1}_rendered.png", "ext": "png"})
     return out
 
 
-def _filter_and_limit_images(images: list[dict[str, Any]]) -> None:
-    """In-place: cap size/count for vision API; resize huge with Pillow."""
+def _downsize_xref_image(doc: Any, xref: int, max_pixels: int) -> bytes:
+    """Decode an embedded image by xref in fitz, scale it under max_pixels and re-encode as JPEG (no PIL roundtrip)."""
+    import fitz
+
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    w, h = pix.width, pix.height
+    if w * h > max_pixels:
+        ratio = (max_pixels / (w * h)) ** 0.5
+        pix = fitz.Pixmap(pix, max(1, int(w * ratio)), max(1, int(h * ratio)))
+    return pix.tobytes("jpeg", jpg_quality=80)
+
+
+def _filter_and_limit_images(images: list[dict[str, Any]], doc: Any = None) -> None:
+    """In-place: cap size/count for vision API. Huge embedded images are downsized via fitz (xref); others via Pillow."""
     max_pixels = 2048 * 2048
     max_count = 10
     max_bytes = 4 * 1024 * 1024
+    del images[max_count:]
     for img in images:
         data = img.get("data") or b""
-        if len(data) > max_bytes:
+        if len(data) <= max_bytes:
+            continue
+        xref = img.get("xref")
+        if doc is not None and xref:
             try:
-                from PIL import Image
-                buf = io.BytesIO(data)
-                pil = Image.open(buf).convert("RGB")
-                w, h = pil.size
-                if w * h > max_pixels:
-                    ratio = (max_pixels / (w * h)) ** 0.5
-                    pil = pil.resize((max(1, int(w * ratio)), max(1, int(h * ratio))), Image.Resampling.LANCZOS)
-                out = io.BytesIO()
-                pil.save(out, format="PNG")
-                img["data"] = out.getvalue()
+                img["data"] = _downsize_xref_image(doc, xref, max_pixels)
+                img["ext"] = "jpg"
+                img["name"] = img["name"].rsplit(".", 1)[0] + ".jpg"
+                continue
             except Exception:
                 pass
-    while len(images) > max_count:
-        images.pop()
+        try:
+            from PIL import Image
+            buf = io.BytesIO(data)
+            pil = Image.open(buf).convert("RGB")
+            w, h = pil.size
+            if w * h > max_pixels:
+                ratio = (max_pixels / (w * h)) ** 0.5
+                pil = pil.resize((max(1, int(w * ratio)), max(1, int(h * ratio))), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            pil.save(out, format="PNG")
+            img["data"] = out.getvalue()
+        except Exception:
+            pass
@@ -1,128 +1,297 @@
 """Sandboxed repo clone, git history, and AST-based graph structure analysis."""
 
 import ast
+import hashlib
+import os
+import random
 import re
+import shutil
+import stat
 import subprocess
 import tempfile
+import threading
 import time
-from contextlib import contextmanager
+from collections import OrderedDict, deque
 from pathlib import Path
 from typing import Any
 
+from src.config import get_git_backend
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
 
 class RepoCloneError(Exception):
     """Raised when clone fails: bad URL, auth, or timeout (after retries)."""
 
 
 CLONE_TIMEOUT_SEC = 120
+CLONE_DEPTH = 200
 GIT_LOG_TIMEOUT_SEC = 30
+HISTORY_MAX_COMMITS = 500
 MAX_CLONE_RETRIES = 2
 INITIAL_BACKOFF_SEC = 2.0
+# Base sleep before retry i (2s, 4s, ...); jittered at the call site.
+_BACKOFFS = tuple(INITIAL_BACKOFF_SEC * (2**i) for i in range(MAX_CLONE_RETRIES))
+
+# One fullmatch decides the URL shape: http(s) with at least owner/repo path segments, or any scp-style git@ URL.
+_URL_RE = re.compile(r"(?P<https>https?://(?:[^/]+/)+[^/]+/?)|(?P<ssh>git@.*)")
+_HOST_RE = re.compile(r"github\.com|gitlab|bitbucket")
+_BAD_URL_CHARS = re.compile(r"\s")
 
-_GIT_URL_PATTERN = re.compile(
-    r"^https?://([^/]+/)+[^/]+/?$|^git@[^:]+:[^/]+/[^/]+\.git$"
+
+# git-http-backend / proxy hiccups show up as "RPC failed; HTTP 502", "early EOF", "returned error: 503".
+_TRANSIENT_RE = re.compile(
+    r"timed out|timeout|connection refused|connection reset|could not resolve host|name or service not known"
+    r"|early eof|rpc failed|returned error: 5",
+    re.IGNORECASE,
 )
+_BRANCH_MISSING_RE = re.compile(r"not found|does not exist", re.IGNORECASE)
+_AUTH_RE = re.compile(r"could not read Username|Authentication failed")
+_NOT_FOUND_RE = re.compile(r"Repository not found|404")
 
 
 def _is_transient_clone_error(stderr: str, stdout: str) -> bool:
-    s = (stderr + " " + stdout).lower()
-    if "timed out" in s or "timeout" in s:
-        return True
-    if "connection refused" in s or "connection reset" in s:
-        return True
-    if "could not resolve host" in s or "name or service not known" in s:
-        return True
-    return False
+    return bool(_TRANSIENT_RE.search(stderr) or _TRANSIENT_RE.search(stdout))
+
+
+def _git_env() -> dict[str, str]:
+    """Environment for git subprocesses: the caller's (proxy, CA bundle, credential helpers keep working) plus no
+    interactive prompts, so a private repo fails fast instead of waiting out CLONE_TIMEOUT_SEC, and English
+    messages, so the stderr classification above is locale-independent. Built per call so later env changes
+    (e.g. load_dotenv) are honoured."""
+    return {**os.environ, "GIT_TERMINAL_PROMPT": "0", "LC_ALL": "C"}
 
 
 def _sanitize_url(url: str) -> str:
     s = (url or "").strip()
-    if "\n" in url or "\r" in url or " " in url:
+    if _BAD_URL_CHARS.search(url or ""):
         raise RepoCloneError("Invalid repo URL: contains disallowed characters")
     return s
 
 
-@contextmanager
-def sandboxed_clone(repo_url: str):
-    """Clone repo (main branch) into a temp directory. Yields path. Raises RepoCloneError on failure."""
-    url = _sanitize_url(repo_url)
-    if not url:
-        raise RepoCloneError("Repo URL is empty")
-    if not _GIT_URL_PATTERN.match(url) and not url.startswith("git@"):
-        if "github.com" not in url and "gitlab" not in url and "bitbucket" not in url:
+def _clone_with_cli(url: str, dest: str, branch: str | None) -> subprocess.CompletedProcess:
+    """Shallow partial clone via the git CLI: CLONE_DEPTH commits of history for extract_git_history, but blobs only
+    for the checked-out tree. Raises subprocess.TimeoutExpired after CLONE_TIMEOUT_SEC."""
+    cmd = ["git", "clone", "--depth", str(CLONE_DEPTH), "--single-branch", "--no-tags", "--filter=blob:none", url, dest]
+    if branch:
+        cmd.insert(2, "--branch")
+        cmd.insert(3, branch)
+    return subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        timeout=CLONE_TIMEOUT_SEC,
+        cwd=None,
+        env=_git_env(),
+    )
+
+
+def _clone_with_pygit2(url: str, dest: str, branch: str | None) -> subprocess.CompletedProcess:
+    """Clone in-process with libgit2 (AUDITOR_GIT_BACKEND=pygit2). Failures are reported like a failed git CLI run
+    (returncode 1, message in stderr) so sandboxed_clone classifies both backends the same way."""
+    cmd = ["pygit2.clone_repository", url, dest]
+    try:
+        pygit2.clone_repository(url, dest, checkout_branch=branch, depth=CLONE_DEPTH)
+    except (pygit2.GitError, KeyError, ValueError) as e:
+        for child in Path(dest).iterdir():
+            if child.is_dir() and not child.is_symlink():
+                shutil.rmtree(child, ignore_errors=True)
+            else:
+                child.unlink(missing_ok=True)
+        msg = str(e)
+        if "authentication" in msg.lower():
+            msg = f"Authentication failed: {msg}"
+        return subprocess.CompletedProcess(cmd, 1, "", msg)
+    return subprocess.CompletedProcess(cmd, 0, "", "")
+
+
+class SandboxedClone:
+    """Context manager: clone repo (main branch) into a temp directory and yield its path; the directory is removed
+    on exit. Raises RepoCloneError on failure.
+
+    The URL is validated on construction, before any temp directory exists; the clone (with retries) runs in
+    __enter__.
+    """
+
+    def __init__(self, repo_url: str) -> None:
+        url = _sanitize_url(repo_url)
+        if not url:
+            raise RepoCloneError("Repo URL is empty")
+        if not _URL_RE.fullmatch(url) and not _HOST_RE.search(url):
             raise RepoCloneError(
                 f"Invalid repo URL: not a recognized git URL (e.g. https://github.com/owner/repo)"
             )
-    tmp = tempfile.TemporaryDirectory(prefix="auditor_clone_")
-    last_error: str | None = None
-    result = None
-    try:
+        self.url = url
+        self._tmp: tempfile.TemporaryDirectory | None = None
+
+    def __enter__(self) -> str:
+        self._tmp = tempfile.TemporaryDirectory(prefix="auditor_clone_")
+        try:
+            self._clone_with_retries(self._tmp.name)
+        except BaseException:
+            self._tmp.cleanup()
+            self._tmp = None
+            raise
+        return self._tmp.name
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def _clone_with_retries(self, dest: str) -> None:
+        url = self.url
+        last_error: str | None = None
+        result = None
+        use_pygit2 = pygit2 is not None and get_git_backend() == "pygit2"
         for attempt in range(MAX_CLONE_RETRIES + 1):
             for branch in ("main", "master", None):
                 try:
-                    cmd = ["git", "clone", "--depth", "200", url, tmp.name]
-                    if branch:
-                        cmd.insert(2, "--branch")
-                        cmd.insert(3, branch)
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        timeout=CLONE_TIMEOUT_SEC,
-                        cwd=None,
-                    )
+                    clone = _clone_with_pygit2 if use_pygit2 else _clone_with_cli
+                    result = clone(url, dest, branch)
                 except subprocess.TimeoutExpired:
                     last_error = "Clone timed out"
                     result = None
                     break
                 if result.returncode == 0:
-                    yield tmp.name
                     return
                 stderr = (result.stderr or "").strip()
                 stdout = (result.stdout or "").strip()
                 last_error = stderr or stdout or "no output"
-                if branch and ("not found" in stderr.lower() or "does not exist" in stderr.lower()):
+                if branch and _BRANCH_MISSING_RE.search(stderr):
                     continue
-                if "could not read Username" in stderr or "Authentication failed" in stderr:
+                if _AUTH_RE.search(stderr):
                     raise RepoCloneError(f"Git authentication failed: {stderr[:300]}")
-                if "Repository not found" in stderr or "404" in stderr:
+                if _NOT_FOUND_RE.search(stderr):
                     raise RepoCloneError(f"Repository not found or inaccessible: {stderr[:300]}")
                 if not branch:
                     break
             if (result is None or result.returncode != 0) and (not _is_transient_clone_error(last_error or "", "") or attempt >= MAX_CLONE_RETRIES):
                 raise RepoCloneError(f"git clone failed: {(last_error or '')[:400]}")
-            if attempt < MAX_CLONE_RETRIES:
-                time.sleep(INITIAL_BACKOFF_SEC * (2**attempt))
+            # Last attempt raised above. Jitter (x0.5-1.5) around the step so concurrent audits don't retry in lockstep.
+            time.sleep(_BACKOFFS[attempt] * (0.5 + random.random()))
         raise RepoCloneError(f"git clone failed: {last_error or 'unknown'}")
+
+
+sandboxed_clone = SandboxedClone
+
+
+_HISTORY_CACHE_SIZE = 32
+_history_cache: OrderedDict[tuple[str, str], list[dict[str, Any]]] = OrderedDict()
+_history_cache_lock = threading.Lock()
+
+
+def _head_sha(path: Path) -> str | None:
+    """Commit sha HEAD points at, read from HEAD / loose ref / packed-refs without running git.
+    None when it cannot be resolved cheaply (not a checkout, unborn branch, .git file of a worktree)."""
+    git_dir = path / ".git"
+    if not git_dir.is_dir():
+        return None
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return head or None
+    ref = head[4:].strip()
+    try:
+        return (git_dir / ref).read_text(encoding="utf-8").strip() or None
+    except OSError:
+        pass
+    try:
+        with open(git_dir / "packed-refs", encoding="utf-8") as f:
+            for line in f:
+                sha, _, name = line.rstrip("\n").partition(" ")
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _history_with_cli(path: Path) -> list[dict[str, Any]] | None:
+    """git log streamed from a Popen pipe and parsed as git emits it (no whole-log buffer); a timer kills git
+    after GIT_LOG_TIMEOUT_SEC. None when git cannot be run or exits nonzero."""
+    try:
+        proc = subprocess.Popen(
+            ["git", "log", "--oneline", "--reverse", "-n", str(HISTORY_MAX_COMMITS), "--format=%s%x00%ci"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=str(path),
+            env=_git_env(),
+        )
+    except OSError:
+        return None
+    entries = []
+    timer = threading.Timer(GIT_LOG_TIMEOUT_SEC, proc.kill)
+    timer.start()
+    try:
+        with proc:
+            # One line per commit: "<subject>\0<committer date>" (subjects never contain newlines or NUL).
+            for line in proc.stdout:
+                message, sep, timestamp = line.partition("\0")
+                if sep:
+                    entries.append({"message": message.strip(), "timestamp": timestamp.strip()})
     finally:
-        tmp.cleanup()
+        timer.cancel()
+    if proc.returncode != 0:
+        return None
+    return entries
+
+
+def _history_with_pygit2(path: Path) -> list[dict[str, Any]] | None:
+    """In-process equivalent of _history_with_cli (AUDITOR_GIT_BACKEND=pygit2): the first HISTORY_MAX_COMMITS commits
+    in git log's default order, reversed, with git's %s subject and %ci timestamp formats. None when libgit2 can't read the repo."""
+    from datetime import datetime, timedelta, timezone
+
+    try:
+        repo = pygit2.Repository(str(path))
+        walker = repo.walk(repo.head.target, pygit2.GIT_SORT_NONE)
+        commits = [c for _, c in zip(range(HISTORY_MAX_COMMITS), walker)]
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+    entries = []
+    for c in reversed(commits):
+        # %s is the first paragraph of the message folded onto one line.
+        subject = " ".join(line.strip() for line in c.message.strip().split("\n\n", 1)[0].splitlines())
+        tz = timezone(timedelta(minutes=c.commit_time_offset))
+        timestamp = datetime.fromtimestamp(c.commit_time, tz).strftime("%Y-%m-%d %H:%M:%S %z")
+        entries.append({"message": subject, "timestamp": timestamp})
+    return entries
 
 
 def extract_git_history(repo_path: str) -> list[dict[str, Any]]:
-    """Run git log on current (main) branch; return list of {message, timestamp}."""
+    """Run git log on current (main) branch; return list of {message, timestamp}.
+
+    With AUDITOR_GIT_BACKEND=pygit2 the log is walked in-process (no git subprocess), falling back to the CLI if
+    libgit2 can't open the repo.
+    Results are cached per (repo path, HEAD sha), so repeated calls on an unchanged checkout skip git entirely.
+    """
     path = Path(repo_path)
     if not path.is_dir():
         return []
-    result = subprocess.run(
-        ["git", "log", "--oneline", "--reverse", "-n", "500", "--format=%h %s%n%ci"],
-        capture_output=True,
-        text=True,
-        timeout=GIT_LOG_TIMEOUT_SEC,
-        cwd=str(path),
-    )
-    if result.returncode != 0:
+    head = _head_sha(path)
+    key = (os.path.abspath(path), head) if head else None
+    if key is not None:
+        with _history_cache_lock:
+            cached = _history_cache.get(key)
+            if cached is not None:
+                _history_cache.move_to_end(key)
+                return [dict(e) for e in cached]
+    entries = None
+    if pygit2 is not None and get_git_backend() == "pygit2":
+        entries = _history_with_pygit2(path)
+    if entries is None:
+        entries = _history_with_cli(path)
+    if entries is None:
         return []
-    out = (result.stdout or "").strip()
-    lines = [ln.strip() for ln in out.splitlines() if ln.strip()]
-    entries = []
-    i = 0
-    while i + 1 < len(lines):
-        first = lines[i]
-        ts = lines[i + 1]
-        parts = first.split(" ", 1)
-        message = parts[1] if len(parts) > 1 else first
-        entries.append({"message": message, "timestamp": ts})
-        i += 2
+    if key is not None:
+        with _history_cache_lock:
+            _lru_put(_history_cache, key, [dict(e) for e in entries], _HISTORY_CACHE_SIZE)
     return entries
 
 
@@ -151,31 +320,26 @@ def analyze_git_forensic(history: list[dict[str, Any]]) -> dict[str, Any]:
     iterative = "feat" in lower_msgs or "fix" in lower_msgs or "refactor" in lower_msgs or "chore" in lower_msgs or "docs" in lower_msgs or "add" in lower_msgs or "implement" in lower_msgs
     out["progression_story"] = (out["count"] > 3) and (setup or tools or graph or iterative)
     if out["count"] >= 3:
-        try:
-            from datetime import datetime
-            times = []
-            for h in history:
-                ts = (h.get("timestamp") or "").strip()
-                if not ts:
-                    continue
-                parts = ts.split()
-                if len(parts) >= 2:
-                    date_part = parts[0]
-                    time_part = parts[1][:8]
-                    try:
-                        times.append(datetime.fromisoformat(f"{date_part} {time_part}"))
-                    except Exception:
-                        pass
-                elif parts:
-                    try:
-                        times.append(datetime.fromisoformat(parts[0]))
-                    except Exception:
-                        pass
-            if len(times) >= 2:
-                span_sec = (max(times) - min(times)).total_seconds()
-                out["bulk_upload"] = span_sec < 1800 and out["count"] >= 15
-        except Exception:
-            pass
+        from datetime import datetime
+        tmin = tmax = None
+        parsed = 0
+        for h in history:
+            # git %ci is "YYYY-MM-DD HH:MM:SS +zzzz"; the first 19 chars are a naive ISO timestamp (C-level parse).
+            ts = (h.get("timestamp") or "").strip()[:19]
+            if not ts:
+                continue
+            try:
+                t = datetime.fromisoformat(ts)
+            except ValueError:
+                continue
+            parsed += 1
+            if tmin is None or t < tmin:
+                tmin = t
+            if tmax is None or t > tmax:
+                tmax = t
+        if parsed >= 2:
+            span_sec = (tmax - tmin).total_seconds()
+            out["bulk_upload"] = span_sec < 1800 and out["count"] >= 15
     if out["count"] <= 2:
         out["bulk_upload"] = True
     if out["bulk_upload"]:
@@ -187,15 +351,85 @@ def analyze_git_forensic(history: list[dict[str, Any]]) -> dict[str, Any]:
     return out
 
 
+_AST_CACHE_SIZE = 256
+_ast_cache: OrderedDict[tuple[str, str], ast.Module] = OrderedDict()
+_ast_by_stat: OrderedDict[tuple[str, int, int], ast.Module] = OrderedDict()
+_ast_cache_lock = threading.Lock()
+
+_STRUCTURE_CACHE_SIZE = 32
+_structure_cache: OrderedDict[tuple[tuple[str, int, int], ...], dict[str, Any]] = OrderedDict()
+
+
+def _file_stat_key(file_path: Path) -> tuple[str, int, int] | None:
+    """(path, mtime_ns, size) for a regular file, else None. One stat serves as is_file check and cache key."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return (str(file_path), st.st_mtime_ns, st.st_size)
+
+
+def _lru_put(cache: OrderedDict, key: Any, value: Any, size: int) -> None:
+    cache[key] = value
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _parse_source(file_path: Path, stat_key: tuple[str, int, int] | None = None) -> ast.Module:
+    """Parse a Python file once per content: trees are cached by (path, sha256 of bytes). Raises OSError/SyntaxError.
+
+    With stat_key (from _file_stat_key), an unchanged (path, mtime_ns, size) returns the tree without reading the file.
+    """
+    if stat_key is not None:
+        with _ast_cache_lock:
+            tree = _ast_by_stat.get(stat_key)
+            if tree is not None:
+                _ast_by_stat.move_to_end(stat_key)
+                return tree
+    data = file_path.read_bytes()
+    key = (str(file_path), hashlib.sha256(data).hexdigest())
+    with _ast_cache_lock:
+        tree = _ast_cache.get(key)
+        if tree is not None:
+            _ast_cache.move_to_end(key)
+    if tree is None:
+        # Bytes let the tokenizer handle a BOM / coding cookie itself; undecodable files fall back to lossy UTF-8.
+        try:
+            tree = ast.parse(data, filename=str(file_path))
+        except SyntaxError:
+            tree = ast.parse(data.decode("utf-8", errors="replace"), filename=str(file_path))
+    with _ast_cache_lock:
+        _lru_put(_ast_cache, key, tree, _AST_CACHE_SIZE)
+        if stat_key is not None:
+            _lru_put(_ast_by_stat, stat_key, tree, _AST_CACHE_SIZE)
+    return tree
+
+
+def _copy_structure(out: dict[str, Any]) -> dict[str, Any]:
+    """Independent copy of an analyze_graph_structure result (lists copied; their items are immutable)."""
+    return {k: list(v) if isinstance(v, list) else v for k, v in out.items()}
+
+
 def analyze_graph_structure(repo_path: str) -> dict[str, Any]:
     """
     Use AST to inspect graph structure: StateGraph usage, add_edge/add_conditional_edges,
     decorators, inheritance (BaseModel, TypedDict). Returns edges, nodes, has_state_graph,
     has_conditional_edges, reducers, state_classes.
+
+    Results are cached per (path, mtime_ns, size) of graph.py/state.py; callers get their own copy.
     """
     path = Path(repo_path)
-    graph_file = path / "src" / "graph.py"
-    state_file = path / "src" / "state.py"
+    files = [(f, _file_stat_key(f)) for f in (path / "src" / "graph.py", path / "src" / "state.py")]
+    files = [(f, k) for f, k in files if k is not None]
+    cache_key = tuple(k for _, k in files)
+    with _ast_cache_lock:
+        cached = _structure_cache.get(cache_key)
+        if cached is not None:
+            _structure_cache.move_to_end(cache_key)
+    if cached is not None:
+        return _copy_structure(cached)
     out: dict[str, Any] = {
         "has_state_graph": False,
         "nodes": [],
@@ -204,69 +438,142 @@ def analyze_graph_structure(repo_path: str) -> dict[str, Any]:
         "state_classes": [],
         "reducers": [],
     }
-    for file_path in (graph_file, state_file):
-        if not file_path.is_file():
-            continue
+    visitor = _GraphVisitor(out)
+    for file_path, key in files:
         try:
-            text = file_path.read_text(encoding="utf-8", errors="replace")
-            tree = ast.parse(text)
+            tree = _parse_source(file_path, key)
         except (SyntaxError, OSError):
             continue
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                bases = []
-                for b in node.bases:
-                    if isinstance(b, ast.Name):
-                        bases.append(b.id)
-                    elif isinstance(b, ast.Attribute):
-                        bases.append(ast.unparse(b) if hasattr(ast, "unparse") else b.attr)
-                if "StateGraph" in bases or "TypedDict" in bases or "BaseModel" in bases:
-                    out["state_classes"].append(node.name)
-                if "TypedDict" in bases or "BaseModel" in bases:
-                    for stmt in node.body:
-                        if isinstance(stmt, ast.AnnAssign) and stmt.annotation:
-                            _collect_reducers(stmt.annotation, out["reducers"])
-            if isinstance(node, ast.Call):
-                func = node.func
-                if isinstance(func, ast.Attribute):
-                    if isinstance(func.value, ast.Name):
-                        var = func.value.id
-                    else:
-                        var = getattr(ast.unparse(func.value), "__call__", "") if hasattr(ast, "unparse") else ""
-                    if func.attr == "add_edge":
-                        out["has_state_graph"] = True
-                        args = node.args
-                        if len(args) >= 2:
-                            src = _arg_to_str(args[0])
-                            tgt = _arg_to_str(args[1])
-                            if src and tgt:
-                                out["edges"].append((src, tgt))
-                    elif func.attr == "add_conditional_edges":
-                        out["has_state_graph"] = True
-                        out["has_conditional_edges"] = True
-                        if node.args:
-                            src = _arg_to_str(node.args[0])
-                            if src:
-                                out["edges"].append((src, "__conditional__"))
-                    elif func.attr == "add_node" and node.args:
-                        out["has_state_graph"] = True
-                        name = _arg_to_str(node.args[0])
-                        if name:
-                            out["nodes"].append(name)
-    out["nodes"] = list(dict.fromkeys(out["nodes"]))
-    out["edges"] = list(dict.fromkeys(out["edges"]))
+        visitor.visit(tree)
+    visitor.finish()
+    with _ast_cache_lock:
+        _lru_put(_structure_cache, cache_key, _copy_structure(out), _STRUCTURE_CACHE_SIZE)
     return out
 
 
+_MODEL_BASES = frozenset(("TypedDict", "BaseModel"))
+_STATE_BASES = _MODEL_BASES | {"StateGraph"}
+
+
+# Nodes with no AST children worth visiting; never queued.
+_WALK_LEAF_TYPES = frozenset((ast.Name, ast.Constant, ast.Load, ast.Store, ast.Del))
+
+
+class _GraphVisitor:
+    """One pass over a module for analyze_graph_structure: state classes/reducers from ClassDef, graph wiring from Call.
+
+    Breadth-first over the whole tree, in ast.walk order (so edges/nodes keep the order ast.walk produced), but
+    dispatched on exact node type and without queueing Name/Constant/context leaves. Every statement and
+    expression is reached, including match cases, decorators, with items and if/while tests.
+    """
+
+    def __init__(self, out: dict[str, Any]) -> None:
+        self.out = out
+        # Insertion-ordered sets (first occurrence wins); copied into out["nodes"]/out["edges"] by finish().
+        self.nodes: dict[str, None] = {}
+        self.edges: dict[tuple[str, str], None] = {}
+        self._call_handlers = {
+            "add_edge": self._add_edge,
+            "add_conditional_edges": self._add_conditional_edges,
+            "add_node": self._add_node,
+        }
+
+    def visit(self, tree: ast.Module) -> None:
+        call_handlers = self._call_handlers
+        leaf_types = _WALK_LEAF_TYPES
+        iter_child_nodes = ast.iter_child_nodes
+        todo = deque([tree])
+        while todo:
+            node = todo.popleft()
+            t = type(node)
+            if t is ast.Call:
+                func = node.func
+                if type(func) is ast.Attribute:
+                    handler = call_handlers.get(func.attr)
+                    if handler is not None:
+                        handler(node)
+            elif t is ast.ClassDef:
+                self._visit_class(node)
+            todo.extend(child for child in iter_child_nodes(node) if type(child) not in leaf_types)
+
+    def finish(self) -> None:
+        self.out["nodes"] = list(self.nodes)
+        self.out["edges"] = list(self.edges)
+
+    def _visit_class(self, node: ast.ClassDef) -> None:
+        bases = []
+        for b in node.bases:
+            if isinstance(b, ast.Name):
+                bases.append(b.id)
+            elif isinstance(b, ast.Attribute):
+                bases.append(_arg_to_str(b))
+        if not _STATE_BASES.isdisjoint(bases):
+            self.out["state_classes"].append(node.name)
+        if not _MODEL_BASES.isdisjoint(bases):
+            for stmt in node.body:
+                if isinstance(stmt, ast.AnnAssign) and stmt.annotation:
+                    _collect_reducers(stmt.annotation, self.out["reducers"])
+
+    def _add_edge(self, node: ast.Call) -> None:
+        self.out["has_state_graph"] = True
+        args = node.args
+        if len(args) >= 2:
+            src = _arg_to_str(args[0])
+            tgt = _arg_to_str(args[1])
+            if src and tgt:
+                self.edges[(src, tgt)] = None
+
+    def _add_conditional_edges(self, node: ast.Call) -> None:
+        self.out["has_state_graph"] = True
+        self.out["has_conditional_edges"] = True
+        if node.args:
+            src = _arg_to_str(node.args[0])
+            if src:
+                self.edges[(src, "__conditional__")] = None
+
+    def _add_node(self, node: ast.Call) -> None:
+        if node.args:
+            self.out["has_state_graph"] = True
+            name = _arg_to_str(node.args[0])
+            if name:
+                self.nodes[name] = None
+
+
+_REDUCER_MAX_DEPTH = 32
+# Nodes that cannot contain a Subscript; never pushed.
+_REDUCER_LEAF_TYPES = (ast.Name, ast.Constant, ast.expr_context)
+
+
 def _collect_reducers(ann: ast.expr, reducers: list[str]) -> None:
-    if isinstance(ann, ast.Subscript):
-        sl = ann.slice
-        if isinstance(sl, ast.Tuple):
-            for s in sl.elts:
-                if isinstance(s, ast.Attribute) and getattr(s.value, "id", None) == "operator":
-                    reducers.append(s.attr)
-    for child in ast.iter_child_nodes(ann):
-        _collect_reducers(child, reducers)
+    """Append operator.X reducers from Annotated[..., operator.X] anywhere in ann (pre-order, like the old recursion).
+    Iterative with a depth cap, so pathological annotations cannot exhaust the stack."""
+    stack: list[tuple[ast.AST, int]] = [(ann, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if type(node) is ast.Subscript:
+            sl = node.slice
+            if type(sl) is ast.Tuple:
+                for s in sl.elts:
+                    if type(s) is ast.Attribute and getattr(s.value, "id", None) == "operator":
+                        reducers.append(s.attr)
+        if depth < _REDUCER_MAX_DEPTH:
+            stack.extend(
+                (child, depth + 1)
+                for child in reversed(list(ast.iter_child_nodes(node)))
+                if not isinstance(child, _REDUCER_LEAF_TYPES)
+            )
+
+
+def _dotted_name(node: ast.expr) -> str | None:
+    """'a.b.c' for an Attribute chain rooted at a Name, built from .attr/.id directly; None for any other shape."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
 
 
 def _arg_to_str(arg: ast.expr) -> str:
@@ -274,6 +581,11 @@ def _arg_to_str(arg: ast.expr) -> str:
         return str(arg.value) if arg.value is not None else ""
     if isinstance(arg, ast.Name):
         return arg.id
+    if isinstance(arg, ast.Attribute):
+        dotted = _dotted_name(arg)
+        if dotted is not None:
+            return dotted
+    # Rare shapes (f-strings, calls, subscripts): regenerate source as a last resort.
     if hasattr(ast, "unparse"):
         return ast.unparse(arg)
     return ""
@@ -302,11 +614,11 @@ def analyze_graph_wiring_patterns(repo_path: str) -> dict[str, Any]:
         "edges_by_source": {},
         "edges_by_target": {},
     }
-    if not graph_file.is_file():
+    graph_key = _file_stat_key(graph_file)
+    if graph_key is None:
         return out
     try:
-        text = graph_file.read_text(encoding="utf-8", errors="replace")
-        tree = ast.parse(text)
+        tree = _parse_source(graph_file, graph_key)
     except (SyntaxError, OSError):
         return out
     edges: list[tuple[str, str]] = []
@@ -0,0 +1,56 @@
+"""Unit tests for the API's run polling endpoint: pre-encoded results and the dict fallback."""
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from src import run_store
+from src.api import app
+
+RESULT = {
+    "evidences": {"git_forensic_analysis": [{"goal": "git_forensic_analysis", "found": True}]},
+    "final_report": {"overall_score": 3.5, "criteria": []},
+    "overall_score": 3.5,
+}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(run_store, "_run_store", run_store.OrderedDict())
+    return run_store._run_store
+
+
+def _completed(result=None, result_json=None) -> dict:
+    return {
+        "status": "completed",
+        "result": result,
+        "result_json": result_json,
+        "error": None,
+        "created_at": 0.0,
+        "finished_at": 1.0,
+    }
+
+
+def test_get_run_returns_pre_encoded_result_verbatim(store):
+    store["r1"] = _completed(result_json=orjson.dumps(RESULT))
+    resp = TestClient(app).get("/api/run/r1")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == {"run_id": "r1", "status": "completed", "result": RESULT, "error": None}
+
+
+def test_get_run_falls_back_to_result_dict(store):
+    store["r2"] = _completed(result=RESULT)
+    resp = TestClient(app).get("/api/run/r2")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "completed"
+    assert body["result"]["overall_score"] == 3.5
+    assert body["result"]["final_report"] == RESULT["final_report"]
+
+
+def test_get_run_pending_and_missing(store):
+    store["r3"] = dict(_completed(), status="pending", finished_at=None)
+    client = TestClient(app)
+    assert client.get("/api/run/r3").json() == {"run_id": "r3", "status": "pending", "result": None, "error": None}
+    assert client.get("/api/run/nope").status_code == 404
@@ -0,0 +1,365 @@
+"""Unit tests for doc_tools: PDF download cache and buffering, the shared fitz document cache, chunk term scanning
+and paragraph chunking."""
+
+import io
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from src.tools import doc_tools
+from src.tools.doc_tools import ChunkQueryResult, pdf_to_binary, query_chunks, query_chunks_with_terms
+
+
+def _image_pdf(n_images: int) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for i in range(n_images):
+        page = doc.new_page()
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20 + i, 20 + n_images), False)
+        pix.set_rect(pix.irect, (i * 40 % 255, n_images * 30 % 255, 100))
+        page.insert_image(fitz.Rect(10, 10, 100, 100), pixmap=pix)
+    return doc.tobytes()
+
+
+@pytest.fixture
+def doc_cache():
+    doc_tools.release_pdf_documents()
+    yield doc_tools._doc_cache
+    doc_tools.release_pdf_documents()
+
+
+def test_fitz_document_shared_across_calls_and_threads(doc_cache):
+    pdf = _image_pdf(2)
+    with doc_tools._fitz_document(pdf) as doc:
+        pass
+    with doc_tools._fitz_document(pdf) as again:
+        assert again is doc
+    other = []
+
+    def use() -> None:
+        with doc_tools._fitz_document(pdf) as d:
+            other.append(d)
+
+    t = threading.Thread(target=use)
+    t.start()
+    t.join()
+    assert other == [doc]
+    assert len(doc_cache) == 1
+
+
+def test_evicted_document_is_closed(doc_cache, monkeypatch):
+    monkeypatch.setattr(doc_tools, "_DOC_CACHE_SIZE", 1)
+    with doc_tools._fitz_document(_image_pdf(1)) as first:
+        pass
+    with doc_tools._fitz_document(_image_pdf(2)):
+        pass
+    assert first.is_closed
+    assert len(doc_cache) == 1
+
+
+def test_document_in_use_is_closed_after_its_user_is_done(doc_cache):
+    with doc_tools._fitz_document(_image_pdf(1)) as doc:
+        doc_tools.release_pdf_documents()
+        assert not doc.is_closed
+        assert doc.page_count == 1
+    assert doc.is_closed
+    assert len(doc_cache) == 0
+
+
+def test_fitz_document_survives_concurrent_eviction(doc_cache, monkeypatch):
+    pdfs = {n: _image_pdf(n) for n in range(1, 6)}
+    # A one-entry cache evicts on nearly every call, while other threads are still reading their document.
+    monkeypatch.setattr(doc_tools, "_DOC_CACHE_SIZE", 1)
+    errors = []
+
+    def worker(offset: int) -> None:
+        try:
+            for i in range(5):
+                n = (offset + i) % 5 + 1
+                got = len(doc_tools.extract_images_from_pdf(pdf_bytes=pdfs[n]))
+                if got != n:
+                    errors.append((n, got))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    # Everything evicted was closed; only the last document is still cached.
+    assert len(doc_cache) == 1
+
+
+TERMS = ("Fan-In", "Fan-In/Fan-Out", "in/fan", "Dialectical Synthesis", "State Synchronization", "LLM", "AI")
+TEXTS = [
+    "We use FAN-IN/fan-out for the detectives and dialectical synthesis for the judges.",
+    "Only fan-in here, and an AI mention.",
+    "state   synchronization with extra spaces does not count",
+    "",
+]
+
+
+def _expected_hits(terms: tuple[str, ...], text: str) -> set[str]:
+    """Reference for _terms_matcher: lowercased terms longer than 2 chars contained in the lowercased text."""
+    return {t.lower() for t in terms if len(t) > 2 and t.lower() in text.lower()}
+
+
+@pytest.fixture
+def regex_scan(monkeypatch):
+    """Force the compiled-regex fallback (no bytes scan, no Aho-Corasick)."""
+    monkeypatch.setattr(doc_tools, "_BYTES_SCAN_MAX_TERMS", 0)
+    monkeypatch.setattr(doc_tools, "ahocorasick", None)
+    doc_tools._terms_matcher.cache_clear()
+    yield
+    doc_tools._terms_matcher.cache_clear()
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_terms_matcher_regex_fallback_matches_substring_search(regex_scan, text):
+    scan = doc_tools._terms_matcher(TERMS)
+    assert scan.__name__ == "scan_re"
+    assert scan(text) == _expected_hits(TERMS, text)
+
+
+def test_terms_matcher_ignores_short_terms_only():
+    assert doc_tools._terms_matcher(("AI", "ML")) is None
+
+
+def test_query_chunks_with_terms_collects_matches_and_terms_seen():
+    chunks = [{"text": t, "chunk_index": i} for i, t in enumerate(TEXTS)]
+    result = query_chunks_with_terms(chunks, TERMS)
+    assert isinstance(result, ChunkQueryResult)
+    assert [m["chunk_index"] for m in result.matches] == [0, 1]
+    assert result.matches[0]["matched_terms"] == ["Fan-In", "Fan-In/Fan-Out", "in/fan", "Dialectical Synthesis"]
+    # Terms of 2 chars or fewer are matched case-sensitively.
+    assert result.matches[1]["matched_terms"] == ["Fan-In", "AI"]
+    assert result.terms_seen == {"Fan-In", "Fan-In/Fan-Out", "in/fan", "Dialectical Synthesis", "AI"}
+    assert query_chunks(chunks, TERMS) == result.matches
+
+
+@pytest.fixture
+def aho_corasick_scan(monkeypatch):
+    """Force the Aho-Corasick path (skipped without pyahocorasick)."""
+    pytest.importorskip("ahocorasick")
+    monkeypatch.setattr(doc_tools, "_BYTES_SCAN_MAX_TERMS", 0)
+    doc_tools._terms_matcher.cache_clear()
+    yield
+    doc_tools._terms_matcher.cache_clear()
+
+
+@pytest.mark.parametrize("text", TEXTS + ["ÜBERSICHT über Fan-In"])
+def test_terms_matcher_aho_corasick_matches_substring_search(aho_corasick_scan, text):
+    terms = TERMS + ("Übersicht",)
+    scan = doc_tools._terms_matcher(terms)
+    assert scan.__name__ == "scan_ac"
+    assert scan(text) == _expected_hits(terms, text)
+
+
+def test_terms_matcher_uses_aho_corasick_for_non_ascii_terms():
+    pytest.importorskip("ahocorasick")
+    assert doc_tools._terms_matcher(("Übersicht", "Fan-In")).__name__ == "scan_ac"
+
+
+@pytest.mark.parametrize("text", TEXTS + ["Ünïcödé text with FAN-IN/FAN-OUT", "fan­in is not fan-in"])
+def test_terms_matcher_bytes_scan_matches_substring_search(text):
+    doc_tools._terms_matcher.cache_clear()
+    scan = doc_tools._terms_matcher(TERMS)
+    assert scan.__name__ == "scan_bytes"
+    assert scan(text) == _expected_hits(TERMS, text)
+
+
+def test_terms_matcher_bytes_scan_only_for_small_ascii_sets():
+    many = tuple(f"term{i:02d}" for i in range(doc_tools._BYTES_SCAN_MAX_TERMS + 1))
+    assert doc_tools._terms_matcher(many).__name__ != "scan_bytes"
+    assert doc_tools._terms_matcher(many[:-1]).__name__ == "scan_bytes"
+    assert doc_tools._terms_matcher(("Fan-In", "Synthèse")).__name__ != "scan_bytes"
+
+
+class _FakeResponse(io.BytesIO):
+    def __init__(self, body: bytes = b"", headers: dict | None = None) -> None:
+        super().__init__(body)
+        self.headers = headers or {}
+
+
+def _padded_pdf(size: int) -> bytes:
+    """A valid one-page PDF followed by filler up to size bytes (MuPDF ignores data after %%EOF)."""
+    pdf = _image_pdf(1)
+    return pdf + b"\n%" + b"x" * (size - len(pdf) - 2)
+
+
+def test_fitz_document_reads_download_buffer_without_copying(doc_cache):
+    body = _padded_pdf(1_000_000)
+    buf = doc_tools._read_pdf_body(_FakeResponse(body, {"Content-Length": str(len(body))}))
+    assert isinstance(buf, bytearray)
+    assert buf == body
+    with doc_tools._fitz_document(buf) as doc:
+        assert doc.page_count == 1
+        # fitz holds a view of the download buffer itself, not a bytes copy of it.
+        assert isinstance(doc.stream, memoryview)
+        assert doc.stream.obj is buf
+
+
+def test_download_and_open_peak_memory_is_one_body(doc_cache):
+    size = 20_000_000
+    body = _padded_pdf(size)
+    resp = _FakeResponse(body, {"Content-Length": str(size)})
+    tracemalloc.start()
+    try:
+        buf = doc_tools._read_pdf_body(resp)
+        with doc_tools._fitz_document(buf):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 1.5 * size
+
+
+def test_chunk_text_splits_on_blank_and_whitespace_only_lines():
+    text = "  First para.  \n\nSecond para.\n \t \nThird para.\n\n\n\nFourth para.\n"
+    # A large size keeps everything in one chunk, so the join shows exactly how paragraphs were split.
+    assert doc_tools._chunk_text(text, size=1000, overlap=0) == [
+        "First para.\n\nSecond para.\n\nThird para.\n\nFourth para."
+    ]
+
+
+def test_chunk_text_packs_paragraphs_up_to_size():
+    paras = [f"Paragraph {i} " + "x" * 30 for i in range(10)]
+    chunks = doc_tools._chunk_text("\n\n".join(paras), size=100, overlap=0)
+    assert "\n\n".join(chunks) == "\n\n".join(paras)
+    assert all(len(c) <= 100 for c in chunks)
+    assert [c.count("Paragraph") for c in chunks] == [2, 2, 2, 2, 2]
+
+
+def test_chunk_text_whitespace_only_text_has_no_chunks():
+    assert doc_tools._chunk_text(" \n \n\n\t\n ", size=50, overlap=0) == []
+
+
+def _chunk_text_reference(text: str, size: int, overlap: int) -> list[str]:
+    """The original _chunk_text overlap loop (reversed walk + list.insert(0)), on the same paragraph split."""
+    paragraphs = [p for p in map(str.strip, doc_tools._PARA_SPLIT_RE.split(text)) if p]
+    result, current, current_len = [], [], 0
+    for p in paragraphs:
+        if current_len + len(p) + 2 > size and current:
+            result.append("\n\n".join(current))
+            keep, keep_len = [], 0
+            for s in reversed(current if overlap > 0 else []):
+                if keep_len + len(s) + 2 > overlap:
+                    break
+                keep.insert(0, s)
+                keep_len += len(s) + 2
+            current, current_len = keep, keep_len
+        current.append(p)
+        current_len += len(p) + 2
+    if current:
+        result.append("\n\n".join(current))
+    return result
+
+
+def test_chunk_text_overlap_carries_longest_fitting_paragraph_tail():
+    text = "\n\n".join(["a" * 40, "b" * 10, "c" * 10, "d" * 60])
+    assert doc_tools._chunk_text(text, size=70, overlap=25) == [
+        "a" * 40 + "\n\n" + "b" * 10 + "\n\n" + "c" * 10,
+        "b" * 10 + "\n\n" + "c" * 10 + "\n\n" + "d" * 60,
+    ]
+
+
+def test_chunk_text_overlap_matches_original_loop():
+    rng = random.Random(1234)
+    for _ in range(300):
+        paras = ["p" * rng.randint(1, 120) for _ in range(rng.randint(0, 25))]
+        text = "\n\n".join(paras)
+        size, overlap = rng.randint(20, 300), rng.randint(0, 150)
+        assert doc_tools._chunk_text(text, size, overlap) == _chunk_text_reference(text, size, overlap)
+
+
+URL = "https://example.com/report.pdf"
+PDF = b"%PDF-1.4\n" + b"x" * 1000
+
+
+@pytest.fixture
+def pdf_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDITOR_PDF_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("AUDITOR_PDF_CACHE_TTL", "3600")
+    return tmp_path
+
+
+def _serve(monkeypatch, responses):
+    """Patch urlopen to answer from responses (a list of (method, response)); returns the list of methods seen."""
+    seen = []
+
+    def fake_urlopen(req, timeout=None):
+        seen.append(req.get_method())
+        method, resp = responses.pop(0)
+        assert method == req.get_method()
+        return resp
+
+    monkeypatch.setattr(doc_tools, "urlopen", fake_urlopen)
+    return seen
+
+
+def test_pdf_cache_round_trip_reuses_download(pdf_cache, monkeypatch):
+    seen = _serve(monkeypatch, [("GET", _FakeResponse(PDF))])
+    assert pdf_to_binary(URL) == PDF
+    # No validators were stored, so the second call is served by TTL without touching the network.
+    assert pdf_to_binary(URL) == PDF
+    assert seen == ["GET"]
+
+
+def test_pdf_cache_expires_after_ttl(pdf_cache, monkeypatch):
+    seen = _serve(monkeypatch, [("GET", _FakeResponse(PDF)), ("GET", _FakeResponse(PDF))])
+    pdf_to_binary(URL)
+    monkeypatch.setattr(doc_tools, "_cache_clock", lambda: time.time() + 7200)
+    assert pdf_to_binary(URL) == PDF
+    assert seen == ["GET", "GET"]
+
+
+def test_pdf_cache_revalidates_etag(pdf_cache, monkeypatch):
+    newer = b"%PDF-1.4\nnewer"
+    seen = _serve(
+        monkeypatch,
+        [
+            ("GET", _FakeResponse(PDF, {"ETag": '"v1"'})),
+            ("HEAD", _FakeResponse(headers={"ETag": '"v1"'})),
+            ("HEAD", _FakeResponse(headers={"ETag": '"v2"'})),
+            ("GET", _FakeResponse(newer, {"ETag": '"v2"'})),
+        ],
+    )
+    assert pdf_to_binary(URL) == PDF
+    assert pdf_to_binary(URL) == PDF
+    assert pdf_to_binary(URL) == newer
+    assert seen == ["GET", "HEAD", "HEAD", "GET"]
+
+
+def test_pdf_cache_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDITOR_PDF_CACHE_DIR", "off")
+    seen = _serve(monkeypatch, [("GET", _FakeResponse(PDF)), ("GET", _FakeResponse(PDF))])
+    pdf_to_binary(URL)
+    pdf_to_binary(URL)
+    assert seen == ["GET", "GET"]
+
+
+def test_pdf_cache_prunes_idle_entries_and_enforces_size_cap(pdf_cache, monkeypatch):
+    body = b"%PDF-1.4\n" + b"x" * 300_000
+    urls = [f"https://example.com/{i}.pdf" for i in range(4)]
+    for age, url in zip((4000, 300, 200, 100), urls):
+        doc_tools._write_cached_pdf(url, body, None)
+        pdf_file = doc_tools._pdf_cache_paths(url)[0]
+        os.utime(pdf_file, (time.time() - age,) * 2)
+    (pdf_cache / "orphan.json").write_text("{}")
+    monkeypatch.setenv("AUDITOR_PDF_CACHE_MAX_MB", "1")
+    doc_tools._write_cached_pdf("https://example.com/new.pdf", body, None)
+
+    kept = {p.name for p in pdf_cache.iterdir()}
+    # urls[0] was idle past the TTL, urls[1] is the least recently used of the rest and falls to the 1 MB cap.
+    for url, expected in zip(urls, (False, False, True, True)):
+        pdf_file, meta_file = doc_tools._pdf_cache_paths(url)
+        assert (pdf_file.name in kept) is expected
+        assert (meta_file.name in kept) is expected
+    assert "orphan.json" not in kept
+    assert doc_tools._pdf_cache_paths("https://example.com/new.pdf")[0].name in kept
@@ -0,0 +1,46 @@
+"""Unit tests for parallelism_checks graph helpers: node and edge shapes from LangGraph and networkx-style graphs."""
+
+from types import SimpleNamespace
+
+from src.parallelism_checks import _adjacency, _end_node, _node_ids, _start_node
+
+EDGE_PAIRS = [
+    ("__start__", "run_detectives"),
+    ("run_detectives", "evidence_aggregator"),
+    ("evidence_aggregator", "__end__"),
+]
+SUCC = {"__start__": {"run_detectives"}, "run_detectives": {"evidence_aggregator"}, "evidence_aggregator": {"__end__"}}
+PRED = {"run_detectives": {"__start__"}, "evidence_aggregator": {"run_detectives"}, "__end__": {"evidence_aggregator"}}
+
+
+def test_node_ids_from_dict_and_callable():
+    names = {"__start__", "run_detectives", "__end__"}
+    assert _node_ids(SimpleNamespace(nodes={n: object() for n in names})) == names
+    assert _node_ids(SimpleNamespace(nodes=lambda: list(names))) == names
+
+
+def test_adjacency_from_edge_objects():
+    # LangGraph: G.edges is a list of Edge records with .source / .target.
+    edges = [SimpleNamespace(source=s, target=t, conditional=False) for s, t in EDGE_PAIRS]
+    assert _adjacency(SimpleNamespace(edges=edges)) == (SUCC, PRED)
+
+
+def test_adjacency_from_tuple_list_and_callable():
+    assert _adjacency(SimpleNamespace(edges=list(EDGE_PAIRS))) == (SUCC, PRED)
+    # networkx-style: G.edges() yields (u, v) pairs.
+    assert _adjacency(SimpleNamespace(edges=lambda: iter(EDGE_PAIRS))) == (SUCC, PRED)
+
+
+def test_adjacency_collects_fan_out_and_fan_in_in_one_pass():
+    edges = [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d"), ("a", "b")]
+    succ, pred = _adjacency(SimpleNamespace(edges=edges))
+    assert succ == {"a": {"b", "c"}, "b": {"d"}, "c": {"d"}}
+    assert pred == {"b": {"a"}, "c": {"a"}, "d": {"b", "c"}}
+
+
+def test_start_and_end_node_names():
+    assert _start_node({"__start__", "x"}) == "__start__"
+    assert _start_node({"start", "x"}) == "start"
+    assert _start_node({"x"}) is None
+    assert _end_node({"end", "x"}) == "end"
+    assert _end_node({"x"}) is None
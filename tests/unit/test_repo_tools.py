@@ -1,5 +1,10 @@
-"""Unit tests for repo_tools: sandboxed clone, AST graph analysis, bad URL and auth handling."""
+"""Unit tests for repo_tools: sandboxed clone, AST graph analysis (visitor parity with ast.walk) and its caches, git
+history cache, URL validation and auth handling."""
 
+import ast
+import os
+import shutil
+import subprocess
 import tempfile
 from pathlib import Path
 from types import SimpleNamespace
@@ -7,6 +12,7 @@ from unittest.mock import patch
 
 import pytest
 
+from src.tools import repo_tools
 from src.tools.repo_tools import (
     RepoCloneError,
     analyze_graph_structure,
@@ -85,3 +91,211 @@ def test_analyze_graph_structure_this_repo():
         "evidence_aggregator" in str(e) for e in out["edges"]
     )
     assert out["has_conditional_edges"] is True
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://github.com/owner/repo",
+        "https://github.com/owner/repo.git",
+        "https://github.com/owner/repo/",
+        "http://git.example.org/group/sub/repo",
+        "git@github.com:owner/repo.git",
+        "https://gitlab.example.com",
+    ],
+)
+def test_sandboxed_clone_accepts_git_urls(url):
+    assert sandboxed_clone(url).url == url
+
+
+@pytest.mark.parametrize("url", ["https://example.com", "ftp://example.com/a/b", "owner/repo", "example.com/a/b"])
+def test_sandboxed_clone_rejects_unrecognized_urls(url):
+    with pytest.raises(RepoCloneError, match="Invalid repo URL"):
+        sandboxed_clone(url)
+
+
+@pytest.mark.parametrize("url", ["https://github.com/a/b c", "https://github.com/a/b\r", "https://github.com/a/\tb"])
+def test_sandboxed_clone_rejects_whitespace_inside_url(url):
+    with pytest.raises(RepoCloneError, match="disallowed"):
+        sandboxed_clone(url)
+
+
+def test_parse_source_cache_hit_and_invalidation(tmp_path):
+    f = tmp_path / "mod.py"
+    f.write_text("x = 1\n")
+    key = repo_tools._file_stat_key(f)
+    tree = repo_tools._parse_source(f, key)
+    assert repo_tools._parse_source(f, key) is tree
+
+    # Same bytes under a new mtime: the stat key misses, but the content hash still finds the tree.
+    os.utime(f, ns=(key[1] + 10**9, key[1] + 10**9))
+    assert repo_tools._parse_source(f, repo_tools._file_stat_key(f)) is tree
+
+    f.write_text("x = 22\n")
+    changed = repo_tools._parse_source(f, repo_tools._file_stat_key(f))
+    assert changed is not tree
+    assert changed.body[0].value.value == 22
+
+
+def _write_graph_repo(root: Path, graph_src: str, state_src: str = "") -> None:
+    (root / "src").mkdir(exist_ok=True)
+    (root / "src" / "graph.py").write_text(graph_src)
+    (root / "src" / "state.py").write_text(state_src)
+
+
+def test_analyze_graph_structure_cache_returns_copies_and_sees_edits(tmp_path):
+    _write_graph_repo(tmp_path, 'g.add_node("a", f)\ng.add_edge("a", "b")\n')
+    first = analyze_graph_structure(str(tmp_path))
+    first["nodes"].append("mutated")
+    second = analyze_graph_structure(str(tmp_path))
+    assert second["nodes"] == ["a"]
+    assert second["edges"] == [("a", "b")]
+
+    (tmp_path / "src" / "graph.py").write_text(
+        'g.add_node("a", f)\ng.add_node("c", f)\ng.add_conditional_edges("c", r)\n'
+    )
+    third = analyze_graph_structure(str(tmp_path))
+    assert third["nodes"] == ["a", "c"]
+    assert third["edges"] == [("c", "__conditional__")]
+    assert third["has_conditional_edges"] is True
+
+
+_PARITY_GRAPH = '''
+import operator
+from typing import Annotated, TypedDict
+
+@register(g.add_node("decorated", f))
+def build(g, cond):
+    g.add_node("start", f)
+    if g.add_edge("in_if_test", "x"):
+        g.add_edge("in_if_body", "y")
+    while g.add_edge("in_while_test", "z"):
+        break
+    with ctx(g.add_node("in_with", f)) as c:
+        g.add_edge("start", "in_with")
+    for n in g.add_node("in_for_iter", f):
+        g.add_edge(n, "loop")
+    match cond:
+        case "a":
+            g.add_edge("start", "case_a")
+        case _:
+            g.add_conditional_edges("start", route, {"x": "y"})
+    lambda: g.add_node("in_lambda", f)
+    [g.add_edge(s, t) for s, t in pairs]
+    g.add_edge("start", "in_with")
+
+    class Inner(TypedDict):
+        total: Annotated[int, operator.add]
+        g.add_node("in_class", f)
+'''
+
+_PARITY_STATE = '''
+import operator
+import pydantic
+from typing import Annotated, TypedDict
+
+class State(TypedDict):
+    evidences: Annotated[dict, operator.ior]
+    opinions: Annotated[list, operator.add]
+
+class Report(pydantic.BaseModel):
+    scores: dict[str, Annotated[list, operator.add]]
+
+class Graph(StateGraph):
+    pass
+
+class Other(object):
+    items: Annotated[list, operator.add]
+'''
+
+
+def _ast_walk_reference(repo_path: Path) -> dict:
+    """The pre-visitor analyze_graph_structure: ast.walk over graph.py then state.py."""
+    out = {
+        "has_state_graph": False,
+        "nodes": [],
+        "edges": [],
+        "has_conditional_edges": False,
+        "state_classes": [],
+        "reducers": [],
+    }
+    for file_path in (repo_path / "src" / "graph.py", repo_path / "src" / "state.py"):
+        for node in ast.walk(ast.parse(file_path.read_text())):
+            if isinstance(node, ast.ClassDef):
+                bases = [ast.unparse(b) for b in node.bases if isinstance(b, (ast.Name, ast.Attribute))]
+                if {"StateGraph", "TypedDict", "BaseModel"} & set(bases):
+                    out["state_classes"].append(node.name)
+                if {"TypedDict", "BaseModel"} & set(bases):
+                    for stmt in node.body:
+                        if isinstance(stmt, ast.AnnAssign):
+                            repo_tools._collect_reducers(stmt.annotation, out["reducers"])
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                args = node.args
+                if node.func.attr == "add_edge":
+                    out["has_state_graph"] = True
+                    if len(args) >= 2 and repo_tools._arg_to_str(args[0]) and repo_tools._arg_to_str(args[1]):
+                        out["edges"].append((repo_tools._arg_to_str(args[0]), repo_tools._arg_to_str(args[1])))
+                elif node.func.attr == "add_conditional_edges":
+                    out["has_state_graph"] = out["has_conditional_edges"] = True
+                    if args and repo_tools._arg_to_str(args[0]):
+                        out["edges"].append((repo_tools._arg_to_str(args[0]), "__conditional__"))
+                elif node.func.attr == "add_node" and args:
+                    out["has_state_graph"] = True
+                    if repo_tools._arg_to_str(args[0]):
+                        out["nodes"].append(repo_tools._arg_to_str(args[0]))
+    out["nodes"] = list(dict.fromkeys(out["nodes"]))
+    out["edges"] = list(dict.fromkeys(out["edges"]))
+    return out
+
+
+_REPO_SRC = Path(__file__).resolve().parents[2] / "src"
+
+
+@pytest.mark.parametrize(
+    "graph_src,state_src",
+    [
+        (_PARITY_GRAPH, _PARITY_STATE),
+        ((_REPO_SRC / "graph.py").read_text(), (_REPO_SRC / "state.py").read_text()),
+    ],
+    ids=["constructs", "this_repo"],
+)
+def test_graph_visitor_matches_ast_walk(tmp_path, graph_src, state_src):
+    _write_graph_repo(tmp_path, graph_src, state_src)
+    out = analyze_graph_structure(str(tmp_path))
+    # Lists are compared as-is: the visitor must keep ast.walk's breadth-first order, not just the same items.
+    assert out == _ast_walk_reference(tmp_path)
+
+
+def test_graph_visitor_reaches_nested_constructs(tmp_path):
+    _write_graph_repo(tmp_path, _PARITY_GRAPH, _PARITY_STATE)
+    out = analyze_graph_structure(str(tmp_path))
+    for name in ("decorated", "in_with", "in_for_iter", "in_lambda", "in_class"):
+        assert name in out["nodes"]
+    for edge in (("in_if_test", "x"), ("in_while_test", "z"), ("start", "case_a"), ("start", "__conditional__")):
+        assert edge in out["edges"]
+    # Dotted bases are compared in full, so pydantic.BaseModel does not count as BaseModel.
+    assert out["state_classes"] == ["Inner", "State", "Graph"]
+    assert sorted(out["reducers"]) == ["add", "add", "ior"]
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def test_extract_git_history_cached_per_head(tmp_path):
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    _git(tmp_path, "commit", "-q", "--allow-empty", "-m", "first")
+    first = extract_git_history(str(tmp_path))
+    assert [e["message"] for e in first] == ["first"]
+
+    first[0]["message"] = "mutated"
+    with patch("src.tools.repo_tools._history_with_cli", side_effect=AssertionError("cache miss")):
+        assert [e["message"] for e in extract_git_history(str(tmp_path))] == ["first"]
+
+    # A new commit moves HEAD, so the cached log is not reused.
+    _git(tmp_path, "commit", "-q", "--allow-empty", "-m", "second")
+    assert [e["message"] for e in extract_git_history(str(tmp_path))] == ["first", "second"]
@@ -0,0 +1,67 @@
+"""Unit tests for rubric_loader: precompiled rubric module is used only while it matches rubric.json."""
+
+import hashlib
+import json
+import sys
+from types import ModuleType
+
+import pytest
+
+from src import rubric_loader
+from src.rubric_loader import get_rubric
+
+RUBRIC = {"dimensions": [{"id": "d1", "name": "One"}], "synthesis_rules": {"rule": "x"}}
+
+
+@pytest.fixture
+def rubric_file(tmp_path, monkeypatch):
+    path = tmp_path / "rubric.json"
+    path.write_text(json.dumps(RUBRIC), encoding="utf-8")
+    monkeypatch.setattr(rubric_loader, "_find_rubric_path", lambda: path)
+    monkeypatch.setitem(sys.modules, "src._rubric_data", None)
+    get_rubric.cache_clear()
+    yield path
+    get_rubric.cache_clear()
+
+
+def _compiled(rubric: dict, sha: str | None) -> ModuleType:
+    mod = ModuleType("src._rubric_data")
+    mod.RUBRIC = rubric
+    if sha is not None:
+        mod.RUBRIC_SHA256 = sha
+    return mod
+
+
+def test_compiled_rubric_used_when_hash_matches(rubric_file, monkeypatch):
+    compiled = {"dimensions": [], "synthesis_rules": {}, "compiled": True}
+    sha = hashlib.sha256(rubric_file.read_bytes()).hexdigest()
+    monkeypatch.setitem(sys.modules, "src._rubric_data", _compiled(compiled, sha))
+    assert get_rubric() is compiled
+
+
+@pytest.mark.parametrize("sha", ["0" * 64, None], ids=["stale_hash", "no_hash"])
+def test_stale_compiled_rubric_falls_back_to_json(rubric_file, monkeypatch, sha):
+    monkeypatch.setitem(sys.modules, "src._rubric_data", _compiled({"dimensions": ["stale"]}, sha))
+    assert get_rubric() == RUBRIC
+
+
+def test_edited_rubric_is_picked_up_after_clear(rubric_file, monkeypatch):
+    sha = hashlib.sha256(rubric_file.read_bytes()).hexdigest()
+    monkeypatch.setitem(sys.modules, "src._rubric_data", _compiled(RUBRIC, sha))
+    assert get_rubric() is RUBRIC
+    edited = {"dimensions": [{"id": "d2"}], "synthesis_rules": {}}
+    rubric_file.write_text(json.dumps(edited), encoding="utf-8")
+    get_rubric.cache_clear()
+    assert get_rubric() == edited
+
+
+def test_missing_module_reads_json(rubric_file):
+    assert get_rubric() == RUBRIC
+
+
+def test_missing_json_uses_compiled_module_or_empty(rubric_file, monkeypatch):
+    rubric_file.unlink()
+    assert get_rubric() == {"dimensions": [], "synthesis_rules": {}}
+    get_rubric.cache_clear()
+    monkeypatch.setitem(sys.modules, "src._rubric_data", _compiled(RUBRIC, "0" * 64))
+    assert get_rubric() is RUBRIC
@@ -0,0 +1,149 @@
+"""Unit tests for run_store: background run execution, failure reporting, TTL expiry and LRU eviction."""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+import orjson
+import pytest
+
+from src import run_store
+from src.run_store import get_run, get_run_status
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(run_store, "_run_store", run_store.OrderedDict())
+    monkeypatch.setenv("AUDITOR_RUN_TTL", "60")
+    monkeypatch.setenv("AUDITOR_MAX_STORED_RUNS", "10")
+    return run_store._run_store
+
+
+def _record(status: str, finished_at: float | None = None) -> dict:
+    return {
+        "status": status,
+        "result": None,
+        "result_json": None,
+        "error": None,
+        "created_at": 0.0,
+        "finished_at": finished_at,
+    }
+
+
+def test_execute_run_builds_graph_off_the_event_loop_thread(store, monkeypatch):
+    threads = {}
+
+    class FakeGraph:
+        async def ainvoke(self, state_input, config=None):
+            threads["invoke"] = threading.get_ident()
+            return {"evidences": {}, "final_report": {"overall_score": 3}}
+
+    def fake_build():
+        threads["build"] = threading.get_ident()
+        return FakeGraph()
+
+    monkeypatch.setattr("src.graph.build_detective_graph", fake_build)
+    # The semaphore binds to the loop that first uses it; give this test's loop its own.
+    monkeypatch.setattr(run_store, "_semaphore", None)
+    store["r"] = _record("pending")
+
+    asyncio.run(run_store._execute_run("r", "https://github.com/a/b", "", []))
+
+    assert threads["build"] != threads["invoke"]
+    assert get_run("r")["status"] == "completed"
+
+
+def test_run_failure_outside_execute_run_is_logged_and_recorded(store, caplog):
+    store["r"] = _record("running")
+    future: Future = Future()
+    future.set_exception(RuntimeError("boom"))
+
+    with caplog.at_level(logging.ERROR, logger="src.run_store"):
+        run_store._log_run_failure("r", future)
+
+    assert "crashed" in caplog.text
+    record = get_run("r")
+    assert record["status"] == "failed"
+    assert "boom" in record["error"]
+
+
+def test_run_done_callback_leaves_finished_runs_alone(store):
+    store["r"] = _record("completed", 1.0)
+    future: Future = Future()
+    future.set_result(None)
+    run_store._log_run_failure("r", future)
+    assert get_run("r")["status"] == "completed"
+
+
+def test_evict_expired_drops_only_finished_runs_past_ttl(store):
+    now = 10_000.0
+    store["old-done"] = _record("completed", now - 61)
+    store["old-failed"] = _record("failed", now - 120)
+    store["recent"] = _record("completed", now - 30)
+    store["running"] = _record("running")
+    store["pending"] = _record("pending")
+
+    assert run_store._evict_expired(now) == 2
+    assert list(store) == ["recent", "running", "pending"]
+
+
+def test_evict_over_capacity_drops_least_recently_used_finished_runs(store):
+    for i in range(12):
+        store[f"r{i}"] = _record("completed" if i % 3 else "running", 1.0)
+    # Reading r1 makes it most recently used, so r2 and r4 go before it.
+    assert get_run("r1") is not None
+
+    with run_store._store_lock:
+        run_store._evict_over_capacity()
+
+    assert len(store) == 10
+    assert "r2" not in store and "r4" not in store
+    assert "r1" in store
+    assert all(f"r{i}" in store for i in range(0, 12, 3))
+
+
+def test_evict_over_capacity_keeps_unfinished_runs(store):
+    for i in range(12):
+        store[f"r{i}"] = _record("pending")
+
+    with run_store._store_lock:
+        run_store._evict_over_capacity()
+
+    assert len(store) == 12
+
+
+def test_get_run_status_after_eviction(store):
+    store["gone"] = _record("completed", 1.0)
+    run_store._evict_expired(1_000.0)
+    assert get_run_status("gone") == "not_found"
+
+
+def _run_with_report(monkeypatch, final_report) -> dict:
+    class FakeGraph:
+        async def ainvoke(self, state_input, config=None):
+            return {"evidences": {}, "final_report": final_report}
+
+    monkeypatch.setattr("src.graph.build_detective_graph", FakeGraph)
+    monkeypatch.setattr(run_store, "_semaphore", None)
+    run_store._run_store["r"] = _record("pending")
+    asyncio.run(run_store._execute_run("r", "https://github.com/a/b", "", []))
+    return get_run("r")
+
+
+def test_execute_run_stores_only_the_encoded_result(store, monkeypatch):
+    record = _run_with_report(monkeypatch, {"overall_score": 4})
+    assert record["status"] == "completed"
+    assert record["result"] is None
+    assert orjson.loads(record["result_json"]) == {
+        "evidences": {},
+        "final_report": {"overall_score": 4},
+        "overall_score": 4,
+    }
+
+
+def test_execute_run_keeps_unencodable_result_as_dict(store, monkeypatch):
+    record = _run_with_report(monkeypatch, {"overall_score": 4, "tags": {"not", "json"}})
+    assert record["status"] == "completed"
+    assert record["result_json"] is None
+    assert record["result"]["overall_score"] == 4
@@ -0,0 +1,31 @@
+"""Unit tests for the Supreme Court chief justice synthesis: evidence rule with model and dict evidence."""
+
+import pytest
+
+from src.nodes.supreme_court import chief_justice_node
+from src.state import Evidence
+
+OPINIONS = [
+    {"judge": "Defense", "criterion_id": "graph_orchestration", "score": 5, "argument": "Great graph."},
+    {"judge": "TechLead", "criterion_id": "graph_orchestration", "score": 4, "argument": "Solid."},
+]
+
+
+def _graph_evidence(found: bool) -> list:
+    return [Evidence(goal="graph_orchestration", found=found, location="src/graph.py", rationale="r", confidence=0.9)]
+
+
+@pytest.mark.parametrize("as_dict", [False, True], ids=["model", "dict"])
+@pytest.mark.parametrize("found", [True, False])
+def test_evidence_rule_reads_model_and_dict_evidence(as_dict, found):
+    evidence = _graph_evidence(found)
+    if as_dict:
+        evidence = [e.model_dump() for e in evidence]
+    out = chief_justice_node({"opinions": OPINIONS, "evidences": {"graph_orchestration": evidence}, "repo_url": "r"})
+    (criterion,) = out["final_report"].criteria
+    if found:
+        assert criterion.final_score == 4
+        assert criterion.dissent_summary is None
+    else:
+        assert criterion.final_score == 2
+        assert criterion.dissent_summary.startswith("Evidence Rule")